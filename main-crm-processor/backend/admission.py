@@ -0,0 +1,97 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+class Overloaded(Exception):
+    """Raised when a request is shed; maps to an HTTP 429/503 with Retry-After"""
+    
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Bound concurrent extractions with a bounded FIFO wait queue.
+    
+    Up to `max_in_flight` callers run at once and up to `max_queue` wait.
+    Anyone beyond that is rejected immediately (429), and queued callers that
+    wait longer than `max_wait` seconds are rejected too (503). Retry-After is
+    estimated from a moving average of observed run times.
+    """
+    
+    def __init__(self, max_in_flight: int, max_queue: int, max_wait: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.rejected = 0
+        self.avg_latency = None
+        self._waiters = deque()
+    
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new request"""
+        latency = self.avg_latency or 1.0
+        backlog = len(self._waiters) + 1
+        return max(1, math.ceil(latency * backlog / self.max_in_flight))
+    
+    def _record(self, duration: float):
+        if self.avg_latency is None:
+            self.avg_latency = duration
+        else:
+            self.avg_latency = 0.8 * self.avg_latency + 0.2 * duration
+    
+    async def _acquire(self):
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(429, "Too many extractions in progress, please retry later", self.retry_after())
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except BaseException as e:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up; pass it on
+                self._release()
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise Overloaded(503, "Extraction queue wait timed out, please retry later", self.retry_after())
+            raise
+    
+    def _release(self):
+        # Hand the slot straight to the next waiter so in_flight stays constant
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+    
+    @asynccontextmanager
+    async def admit(self):
+        await self._acquire()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record(time.monotonic() - start)
+            self._release()
+    
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "avg_latency_seconds": round(self.avg_latency, 3) if self.avg_latency else None
+        }
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Archive leads older than N days to compressed, date-partitioned files
+
+Usage: python archive.py --days 90 [--archive-dir archive] [--batch-size 500]
+
+Each batch is written to its own file,
+archive/YYYY/MM/leads-YYYY-MM-DD-<batch>.jsonl.gz, via a temp file that is
+fsynced and renamed into place before those leads are deleted from the hot
+collection. A crash mid-write leaves only a stray .tmp file, and re-running
+rewrites the same batch file rather than duplicating it. Run it
+periodically, e.g. from cron.
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import zlib
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+from database import db_manager
+from lead_schema import expand_lead, lead_timestamp
+from serialization import dumps
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "90"))
+# Most archived leads a single read-through may return
+MAX_ARCHIVE_READ = int(os.getenv("MAX_ARCHIVE_READ", "500"))
+
+def _batch_path(archive_dir: str, first: Dict[str, Any]) -> str:
+    """Path for the batch starting at `first`; names sort chronologically
+    and are stable, so re-archiving the same batch overwrites its file"""
+    ts = lead_timestamp(first)
+    name = f"leads-{ts:%Y-%m-%d}-{ts:%H%M%S%f}-{first['_id']}.jsonl.gz"
+    return os.path.join(archive_dir, f"{ts:%Y}", f"{ts:%m}", name)
+
+def _write_batch(archive_dir: str, docs: List[Dict[str, Any]]):
+    """Write docs to one new file per day and make them durable"""
+    by_day = defaultdict(list)
+    for doc in docs:
+        by_day[lead_timestamp(doc).date()].append(doc)
+    
+    for day_docs in by_day.values():
+        path = _batch_path(archive_dir, day_docs[0])
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                for doc in day_docs:
+                    gz.write(dumps(doc) + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+        # Persist the rename itself before the leads are deleted
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def archive_old_leads(days: int = RETENTION_DAYS, archive_dir: str = ARCHIVE_DIR, batch_size: int = 500) -> int:
+    """Move leads older than `days` out of the hot collection; returns count"""
+    if db_manager.leads_col is None:
+        print("❌ Database not connected")
+        return 0
+    
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    print(f"🗄️ Archiving leads processed before {cutoff:%Y-%m-%d %H:%M} to {archive_dir}/")
+    archived = 0
+    while True:
+        docs = list(
+            db_manager.leads_col.find({"processed_at": {"$lt": cutoff}})
+            .sort("processed_at", 1)
+            .limit(batch_size)
+        )
+        if not docs:
+            break
+        
+        _write_batch(archive_dir, docs)
+        result = db_manager.leads_col.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        archived += result.deleted_count
+        print(f"   {archived} leads archived...")
+    
+    print(f"✅ Archived {archived} leads")
+    return archived
+
+def read_archived_leads(archive_dir: str = ARCHIVE_DIR, limit: int = MAX_ARCHIVE_READ) -> Iterator[Dict[str, Any]]:
+    """Yield up to `limit` archived leads, newest first, in the LeadResponse shape.
+    
+    Batch files are streamed and only the newest `limit` lines of each are
+    kept, so memory stays bounded by the limit rather than file size. An
+    unreadable file is logged and skipped so it can't fail every read.
+    """
+    limit = max(0, min(limit, MAX_ARCHIVE_READ))
+    paths = sorted(glob.glob(os.path.join(archive_dir, "*", "*", "leads-*.jsonl.gz")), reverse=True)
+    remaining = limit
+    for path in paths:
+        if remaining <= 0:
+            return
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                newest = deque((line for line in f if line.strip()), maxlen=remaining)
+        except (OSError, EOFError, zlib.error) as e:
+            print(f"⚠️ Skipping unreadable archive file {path}: {e}")
+            continue
+        for line in reversed(newest):
+            doc = json.loads(line)
+            doc.pop("_id", None)
+            yield expand_lead(doc)
+        remaining -= len(newest)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="Archive leads older than this")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    archive_old_leads(days=args.days, archive_dir=args.archive_dir, batch_size=args.batch_size)
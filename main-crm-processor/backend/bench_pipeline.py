@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark pipeline throughput offline against recorded LLM responses
+
+Usage: python bench_pipeline.py summaries.jsonl [--concurrency 8] [--speed recorded|fast]
+
+Record fixtures first by running the API or bulk_ingest.py with
+LLM_REPLAY_MODE=record; this script then replays them (no network or API
+key needed) and reports throughput and latency percentiles. Leads are not
+saved and MongoDB is not contacted unless --save is given.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="CSV or JSONL file of meeting summaries")
+    parser.add_argument("--column", default="summary")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--speed", choices=["recorded", "fast"], default="recorded")
+    parser.add_argument("--fixtures", default=None, help="Fixture file (default: LLM_FIXTURES)")
+    parser.add_argument("--any", action="store_true", help="Replay any recorded call for unseen prompts")
+    parser.add_argument("--save", action="store_true", help="Also save leads to MongoDB (MONGO_URI)")
+    args = parser.parse_args()
+    
+    # Configure replay before the extractor builds its model tiers
+    os.environ["LLM_REPLAY_MODE"] = "replay"
+    os.environ["LLM_REPLAY_SPEED"] = args.speed
+    if args.fixtures:
+        os.environ["LLM_FIXTURES"] = args.fixtures
+    if args.any:
+        os.environ["LLM_REPLAY_MISS"] = "any"
+    if not args.save:
+        # An empty (but set) MONGO_URI is not overridden by .env, so the
+        # database module skips connecting and save_lead becomes a no-op
+        os.environ["MONGO_URI"] = ""
+    
+    from bulk_ingest import iter_summaries, _detect_format
+    from processor import process_meeting_summary
+    from database import db_manager
+    if not args.save:
+        db_manager.save_lead = lambda data: "skipped"
+    
+    summaries = [
+        summary.strip()
+        for _, summary in iter_summaries(args.path, _detect_format(args.path), args.column, {"bytes": 0})
+        if summary and summary.strip()
+    ]
+    
+    def timed(summary: str):
+        start = time.perf_counter()
+        result = process_meeting_summary(summary)
+        return time.perf_counter() - start, result.success
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(timed, summaries))
+    elapsed = time.perf_counter() - started
+    
+    latencies = [latency for latency, _ in results]
+    failed = sum(1 for _, success in results if not success)
+    print(f"📊 {len(results)} summaries, concurrency {args.concurrency}, {args.speed} speed"
+          f"{', saving leads' if args.save else ''}:")
+    print(f"   throughput: {len(results) / elapsed:.2f} summaries/s ({elapsed:.2f}s total)")
+    print(f"   latency p50 {percentile(latencies, 50) * 1000:.0f} ms | "
+          f"p95 {percentile(latencies, 95) * 1000:.0f} ms | p99 {percentile(latencies, 99) * 1000:.0f} ms")
+    print(f"   failed: {failed}")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark /api/leads serialization: pydantic response_model path vs FastJSONResponse
+
+Usage: python bench_serialization.py [--leads 10000] [--repeat 5]
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+
+from models import LeadResponse
+from serialization import FastJSONResponse
+
+def make_leads(count: int) -> list:
+    """Build lead documents shaped like the ones stored by save_lead"""
+    now = datetime.utcnow()
+    leads = []
+    for i in range(count):
+        ts = now - timedelta(minutes=i)
+        leads.append({
+            "pii": [
+                {"entity": "PERSON", "start": 14, "end": 27, "score": 0.85},
+                {"entity": "EMAIL_ADDRESS", "start": 60, "end": 84, "score": 1.0},
+            ],
+            "contact": {"name": f"Contact {i}", "title": "VP Sales", "email": f"c{i}@example.com", "phone": None},
+            "company": {"name": f"Company {i}", "industry": "SaaS", "size": "50", "budget": "30000"},
+            "deal": {"value": "50000", "stage": "proposal", "timeline": "Q2", "competitor": "HubSpot", "next_action": "Demo"},
+            "confidence": 0.85,
+            "processed_at": ts,
+            "created_at": ts,
+        })
+    return leads
+
+def pydantic_path(leads: list) -> bytes:
+    """What FastAPI does for response_model=LeadResponse: validate, encode, dump"""
+    model = LeadResponse(leads=leads, total=len(leads))
+    return json.dumps(jsonable_encoder(model)).encode("utf-8")
+
+def fast_path(leads: list) -> bytes:
+    return FastJSONResponse({"leads": leads, "total": len(leads)}).body
+
+def measure(fn, leads: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(leads)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--leads", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    leads = make_leads(args.leads)
+    before = measure(pydantic_path, leads, args.repeat)
+    after = measure(fast_path, leads, args.repeat)
+    
+    print(f"📊 Serializing {args.leads} leads (best of {args.repeat}):")
+    print(f"   pydantic response_model: {before * 1000:.1f} ms")
+    print(f"   FastJSONResponse:        {after * 1000:.1f} ms")
+    print(f"   speedup:                 {before / after:.1f}x")
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Resumable bulk ingestion of meeting summaries from CSV or JSONL files
+
+Usage: python bulk_ingest.py summaries.jsonl [--column summary] [--llm-concurrency 8] [--retry-failed]
+
+Records are streamed from disk and run through process_meeting_summary, so
+PII detection, extraction, normalization and saving behave exactly as for
+/api/process. Progress is checkpointed next to the input file; running the
+same command again resumes where the previous run stopped. Records that
+failed (e.g. an OpenAI timeout) are listed in the checkpoint and re-run with
+--retry-failed. A lock file next to the checkpoint stops two processes from
+ingesting the same file at once.
+"""
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from processor import process_meeting_summary
+
+CHECKPOINT_INTERVAL_SECONDS = 2.0
+
+def _detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+def _read_lines(path: str, progress: Dict[str, int]) -> Iterator[str]:
+    """Yield text lines while counting bytes read, for ETA reporting"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for line in f:
+            progress["bytes"] += len(line.encode("utf-8"))
+            yield line
+
+def iter_summaries(path: str, fmt: str, column: str, progress: Dict[str, int]) -> Iterator[Tuple[int, Optional[str]]]:
+    """Stream (record_index, summary) pairs without loading the file"""
+    lines = _read_lines(path, progress)
+    if fmt == "csv":
+        for index, row in enumerate(csv.DictReader(lines)):
+            progress["records"] += 1
+            yield index, row.get(column)
+    else:
+        index = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                summary = json.loads(line).get(column)
+            except (json.JSONDecodeError, AttributeError):
+                summary = None
+            progress["records"] += 1
+            yield index, summary
+            index += 1
+
+class IngestLocked(RuntimeError):
+    """Another live process is already ingesting this file"""
+
+class JobLock:
+    """Exclusive lock file for one ingestion job, shared across processes.
+
+    Created with O_CREAT|O_EXCL and holding the owner's pid, so a lock left
+    behind by a process that died is detected and replaced.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.held = False
+
+    def owner_alive(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                pid = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return False
+        if pid <= 0:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def acquire(self) -> bool:
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if self.owner_alive():
+                    return False
+                print(f"⚠️ Removing stale ingestion lock {self.path}")
+                try:
+                    os.remove(self.path)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            self.held = True
+            return True
+        return False
+
+    def release(self):
+        if self.held:
+            self.held = False
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+class Checkpoint:
+    """Tracks which record indexes are done.
+
+    Stores a contiguous watermark plus the (small) set of indexes completed
+    beyond it, so concurrent out-of-order completions are never redone.
+    Failed indexes are also kept so they can be retried, and `status` (live
+    progress) is saved alongside for readers in other processes.
+    """
+
+    def __init__(self, path: str, input_path: str, status: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.input_path = input_path
+        self.watermark = 0
+        self.done_after = set()
+        self.failed = set()
+        self.stats = {"succeeded": 0, "failed": 0, "skipped": 0}
+        self.status = status if status is not None else {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.watermark = data.get("watermark", 0)
+        self.done_after = set(data.get("done_after", []))
+        self.failed = set(data.get("failed", []))
+        self.stats.update(data.get("stats", {}))
+        print(f"↩️ Resuming from checkpoint: {self.watermark} records done")
+
+    def is_done(self, index: int, retry_failed: bool = False) -> bool:
+        with self._lock:
+            if retry_failed and index in self.failed:
+                return False
+            return index < self.watermark or index in self.done_after
+
+    def mark_done(self, index: int, outcome: str):
+        with self._lock:
+            if index in self.failed:
+                # A retried failure: replace its earlier outcome
+                self.failed.discard(index)
+                self.stats["failed"] -= 1
+            self.stats[outcome] += 1
+            if outcome == "failed":
+                self.failed.add(index)
+            if index >= self.watermark:
+                self.done_after.add(index)
+            while self.watermark in self.done_after:
+                self.done_after.remove(self.watermark)
+                self.watermark += 1
+
+    def save(self, finished: bool = False):
+        with self._lock:
+            data = {
+                "input": os.path.abspath(self.input_path),
+                "watermark": self.watermark,
+                "done_after": sorted(self.done_after),
+                "failed": sorted(self.failed),
+                "stats": dict(self.stats),
+                "status": dict(self.status),
+                "finished": finished,
+                "updated_at": time.time()
+            }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+def read_job_status(checkpoint_path: str) -> Optional[Dict[str, Any]]:
+    """Progress of the job checkpointed at `checkpoint_path`, readable from
+    any process; None if no such job exists"""
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    status = dict(data.get("status", {}), **data.get("stats", {}))
+    status["finished"] = data.get("finished", False)
+    status["failed_records"] = len(data.get("failed", []))
+    status["running"] = JobLock(f"{checkpoint_path}.lock").owner_alive()
+    return status
+
+def ingest_file(
+    path: str,
+    fmt: Optional[str] = None,
+    column: str = "summary",
+    pii_concurrency: int = 4,
+    llm_concurrency: int = 8,
+    db_concurrency: int = 4,
+    checkpoint_path: Optional[str] = None,
+    status: Optional[Dict[str, Any]] = None,
+    quiet: bool = False,
+    retry_failed: bool = False,
+    lock: Optional[JobLock] = None
+) -> Dict[str, Any]:
+    """Ingest every summary in a CSV/JSONL file; returns final stats.
+
+    `status` (if given) is updated in place with live progress and saved in
+    the checkpoint, so callers such as the /api/ingest endpoint can report
+    on a running job. `lock` may be a JobLock the caller already acquired;
+    otherwise one is taken here and IngestLocked raised if it is held.
+    """
+    fmt = fmt or _detect_format(path)
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint.json"
+    if lock is None:
+        lock = JobLock(f"{checkpoint_path}.lock")
+        if not lock.acquire():
+            raise IngestLocked(f"{path} is already being ingested by another process")
+    try:
+        return _ingest(path, fmt, column, pii_concurrency, llm_concurrency, db_concurrency,
+                       checkpoint_path, status, quiet, retry_failed)
+    finally:
+        lock.release()
+
+def _ingest(
+    path: str,
+    fmt: str,
+    column: str,
+    pii_concurrency: int,
+    llm_concurrency: int,
+    db_concurrency: int,
+    checkpoint_path: str,
+    status: Optional[Dict[str, Any]],
+    quiet: bool,
+    retry_failed: bool
+) -> Dict[str, Any]:
+    """ingest_file's body, run while holding the job lock"""
+    status = status if status is not None else {}
+    status["finished"] = False
+    status.pop("error", None)
+    checkpoint = Checkpoint(checkpoint_path, path, status)
+    # Make the job visible to status readers straight away
+    checkpoint.save()
+    limits = {
+        "pii": threading.BoundedSemaphore(pii_concurrency),
+        "llm": threading.BoundedSemaphore(llm_concurrency),
+        "db": threading.BoundedSemaphore(db_concurrency)
+    }
+    workers = max(pii_concurrency, llm_concurrency, db_concurrency)
+    max_pending = workers * 2
+    total_bytes = os.path.getsize(path) or 1
+    progress = {"bytes": 0, "records": 0}
+
+    def run_one(index: int, summary: Optional[str]) -> Tuple[int, str]:
+        if not summary or not summary.strip():
+            return index, "skipped"
+        result = process_meeting_summary(summary.strip(), limits=limits)
+        if not result.success:
+            print(f"❌ Record {index} failed: {result.error}")
+        return index, "succeeded" if result.success else "failed"
+
+    def report(started: float, processed: int, final: bool = False):
+        elapsed = max(time.time() - started, 1e-6)
+        rate = processed / elapsed
+        fraction = progress["bytes"] / total_bytes
+        # Records still to do: in flight, plus the unread rest of the file at
+        # the average record size so far. Skipped (already done) records are
+        # excluded from the rate, so resumed runs don't report a tiny ETA.
+        bytes_per_record = progress["bytes"] / max(progress["records"], 1)
+        remaining = len(pending) + (total_bytes - progress["bytes"]) / max(bytes_per_record, 1)
+        eta = remaining / rate if rate > 0 and not final else 0
+        status.update({
+            "processed": processed,
+            "records_per_second": round(rate, 2),
+            "percent": round(fraction * 100, 1),
+            "eta_seconds": round(eta),
+            **checkpoint.stats
+        })
+        if not quiet:
+            line = (f"📈 {processed} processed this run | {rate:.2f} rec/s | "
+                    f"{fraction * 100:.1f}% | ETA {eta:.0f}s | "
+                    f"ok {checkpoint.stats['succeeded']} failed {checkpoint.stats['failed']}")
+            print(line if final else f"\r{line}", end="\n" if final else "", flush=True)
+
+    started = time.time()
+    last_report = started
+    processed = 0
+    pending = set()
+
+    def collect(done):
+        nonlocal processed
+        for future in done:
+            # Cancelled or crashed records are not marked, so a resume retries them
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                print(f"❌ Ingestion worker error: {error}")
+                continue
+            index, outcome = future.result()
+            checkpoint.mark_done(index, outcome)
+            processed += 1
+
+    def drain():
+        """Wait for submitted records, checkpointing as they complete"""
+        nonlocal pending
+        while pending:
+            done, pending = wait(pending, timeout=CHECKPOINT_INTERVAL_SECONDS)
+            collect(done)
+            report(started, processed)
+            checkpoint.save()
+
+    print(f"🚚 Ingesting {path} ({fmt}) with PII={pii_concurrency} LLM={llm_concurrency} DB={db_concurrency}")
+    if retry_failed and checkpoint.failed:
+        print(f"🔁 Retrying {len(checkpoint.failed)} failed records")
+    finished = False
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as executor:
+        try:
+            for index, summary in iter_summaries(path, fmt, column, progress):
+                if checkpoint.is_done(index, retry_failed):
+                    continue
+
+                # Bound read-ahead so memory stays flat however large the file is
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(executor.submit(run_one, index, summary))
+
+                now = time.time()
+                if now - last_report >= CHECKPOINT_INTERVAL_SECONDS:
+                    report(started, processed)
+                    checkpoint.save()
+                    last_report = now
+
+            drain()
+            finished = True
+        except Exception as e:
+            status["error"] = str(e)
+            raise
+        finally:
+            if not finished:
+                # Interrupted: skip records not yet started, but record every
+                # one already in flight so a resume doesn't redo (and re-save) it
+                print("\n⏸️ Ingestion interrupted, saving checkpoint...")
+                for future in pending:
+                    future.cancel()
+                drain()
+            report(started, processed, final=True)
+            status["finished"] = finished
+            checkpoint.save(finished=finished)
+
+    print(f"✅ Ingestion complete: {checkpoint.stats}")
+    if checkpoint.failed:
+        print(f"⚠️ {len(checkpoint.failed)} records failed; re-run with --retry-failed to retry them")
+    return dict(checkpoint.stats, processed=processed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="CSV or JSONL file of meeting summaries")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension")
+    parser.add_argument("--column", default="summary", help="CSV column / JSON field holding the summary")
+    parser.add_argument("--pii-concurrency", type=int, default=4)
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    parser.add_argument("--db-concurrency", type=int, default=4)
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <path>.checkpoint.json)")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-run records that failed in earlier runs")
+    args = parser.parse_args()
+
+    ingest_file(
+        args.path,
+        fmt=args.format,
+        column=args.column,
+        pii_concurrency=args.pii_concurrency,
+        llm_concurrency=args.llm_concurrency,
+        db_concurrency=args.db_concurrency,
+        checkpoint_path=args.checkpoint,
+        retry_failed=args.retry_failed
+    )
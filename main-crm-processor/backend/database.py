@@ -1,18 +1,75 @@
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
+import re
 import ssl
 
+from lead_schema import compact_lead, expand_lead, parse_deal_value
+
 # Load MongoDB URI
 load_dotenv()
 mongo_uri = os.getenv("MONGO_URI")
+mongo_max_pool_size = int(os.getenv("MONGO_MAX_POOL_SIZE", "10"))
+idempotency_ttl = int(float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600")))
+
+# Time buckets maintained incrementally in the rollups collection
+ROLLUP_BUCKETS = ["hour", "day", "week"]
+MAX_ROLLUP_POINTS = 500
+
+def bucket_start(ts: datetime, bucket: str) -> datetime:
+    """Truncate a timestamp to the start of its hour/day/week bucket"""
+    if bucket == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "day":
+        return day
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unsupported bucket: {bucket}")
+
+def _rollup_key(label: Any) -> str:
+    """Make a stage/competitor label safe to use as a MongoDB field name"""
+    key = re.sub(r"[.$]", "_", str(label).strip().lower())
+    return key or "unknown"
+
+def rollup_increments(lead: Dict[str, Any]) -> Dict[str, Any]:
+    """The $inc a single lead contributes to each rollup bucket it falls in"""
+    deal = lead.get("deal") or {}
+    deal_value = parse_deal_value(deal.get("value"))
+    inc = {"leads": 1}
+    if deal_value is not None:
+        inc["deals"] = 1
+        inc["total_value"] = deal_value
+        if deal.get("stage"):
+            stage = _rollup_key(deal["stage"])
+            inc[f"by_stage.{stage}.count"] = 1
+            inc[f"by_stage.{stage}.value"] = deal_value
+    if deal.get("competitor"):
+        inc[f"competitors.{_rollup_key(deal['competitor'])}"] = 1
+    return inc
+
+def rollup_updates(processed_at: datetime, inc: Dict[str, Any]) -> List[UpdateOne]:
+    """Upserts applying one $inc to the hour, day and week buckets"""
+    return [
+        UpdateOne(
+            {"bucket": bucket, "start": bucket_start(processed_at, bucket)},
+            {"$inc": inc},
+            upsert=True
+        )
+        for bucket in ROLLUP_BUCKETS
+    ]
 
 class DatabaseManager:
     def __init__(self):
         self.client = None
         self.db = None
         self.leads_col = None
+        self.rollups_col = None
+        self.idempotency_col = None
+        self.listeners = []
         self.connect()
     
     def connect(self):
@@ -36,7 +93,7 @@ class DatabaseManager:
                 'connectTimeoutMS': 30000,
                 'socketTimeoutMS': 30000,
                 'serverSelectionTimeoutMS': 30000,
-                'maxPoolSize': 10,
+                'maxPoolSize': mongo_max_pool_size,
                 'retryWrites': True,
                 'w': 'majority'
             }
@@ -48,6 +105,9 @@ class DatabaseManager:
             
             self.db = self.client.get_database("crm")
             self.leads_col = self.db.get_collection("leads")
+            self.rollups_col = self.db.get_collection("lead_rollups")
+            self.idempotency_col = self.db.get_collection("idempotency_keys")
+            self.ensure_indexes()
             print("✅ MongoDB connection established successfully")
             return True
             
@@ -62,17 +122,50 @@ class DatabaseManager:
                     tlsAllowInvalidCertificates=True,
                     connectTimeoutMS=30000,
                     socketTimeoutMS=30000,
-                    serverSelectionTimeoutMS=30000
+                    serverSelectionTimeoutMS=30000,
+                    maxPoolSize=mongo_max_pool_size
                 )
                 self.client.admin.command('ping')
                 self.db = self.client.get_database("crm")
                 self.leads_col = self.db.get_collection("leads")
+                self.rollups_col = self.db.get_collection("lead_rollups")
+                self.idempotency_col = self.db.get_collection("idempotency_keys")
+                self.ensure_indexes()
                 print("✅ MongoDB connection established (SSL verification disabled)")
                 return True
             except Exception as e2:
                 print(f"❌ Fallback connection also failed: {e2}")
                 return False
     
+    def reconnect(self):
+        """Drop an inherited client and connect again (MongoClient is not fork-safe)"""
+        if self.client is not None:
+            try:
+                self.client.close()
+            except Exception:
+                pass
+        self.client = None
+        self.db = None
+        self.leads_col = None
+        self.rollups_col = None
+        self.idempotency_col = None
+        return self.connect()
+    
+    def add_listener(self, listener):
+        """Register a callback invoked with each lead after it is saved"""
+        self.listeners.append(listener)
+    
+    def ensure_indexes(self):
+        """Create the indexes used by rollup reads and archival"""
+        try:
+            self.rollups_col.create_index([("bucket", 1), ("start", -1)], unique=True)
+            # Used by archive.py to find leads past the retention window
+            self.leads_col.create_index([("processed_at", 1)])
+            # Idempotency keys (unique as _id) expire after the replay window
+            self.idempotency_col.create_index([("created_at", 1)], expireAfterSeconds=idempotency_ttl)
+        except Exception as e:
+            print(f"❌ Error creating indexes: {e}")
+    
     def save_lead(self, data: Dict[str, Any]) -> str:
         """Save lead data to MongoDB"""
         if self.leads_col is None:
@@ -80,16 +173,112 @@ class DatabaseManager:
             return "no_connection"
         
         try:
-            # Add timestamp
-            from datetime import datetime
-            data["created_at"] = data.get("processed_at", datetime.utcnow())
-            res = self.leads_col.insert_one(data)
+            data.setdefault("processed_at", datetime.utcnow())
+            res = self.leads_col.insert_one(compact_lead(data))
             print(f"✅ Lead saved with ID: {res.inserted_id}")
+            self.update_rollups(data)
+            for listener in self.listeners:
+                try:
+                    listener(data)
+                except Exception as e:
+                    print(f"❌ Lead listener error: {e}")
             return str(res.inserted_id)
         except Exception as e:
             print(f"❌ Error saving lead: {e}")
             return f"error: {str(e)}"
     
+    def claim_idempotency_key(self, key: str, lease: float) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Claim a key across worker processes.
+        
+        Returns (True, None) if this caller should run the request, (False,
+        result) if another worker already finished it, or (False, None) while
+        another worker is still running it. A claim older than `lease` seconds
+        is assumed abandoned (its worker died) and is taken over.
+        """
+        if self.idempotency_col is None:
+            return True, None
+        
+        now = datetime.utcnow()
+        try:
+            self.idempotency_col.insert_one({"_id": key, "status": "running", "claimed_at": now, "created_at": now})
+            return True, None
+        except DuplicateKeyError:
+            pass
+        except Exception as e:
+            print(f"❌ Error claiming idempotency key: {e}")
+            return True, None
+        
+        try:
+            doc = self.idempotency_col.find_one({"_id": key})
+            if doc is not None and doc.get("status") == "done":
+                return False, doc.get("result")
+            taken = self.idempotency_col.find_one_and_update(
+                {"_id": key, "status": "running", "claimed_at": {"$lt": now - timedelta(seconds=lease)}},
+                {"$set": {"claimed_at": now, "created_at": now}}
+            )
+            return taken is not None, None
+        except Exception as e:
+            print(f"❌ Error reading idempotency key: {e}")
+            return True, None
+    
+    def complete_idempotency_key(self, key: str, result: Dict[str, Any]):
+        """Store the result of a claimed key so other workers replay it"""
+        if self.idempotency_col is None:
+            return
+        try:
+            self.idempotency_col.update_one(
+                {"_id": key},
+                {"$set": {"status": "done", "result": result, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"❌ Error storing idempotency result: {e}")
+    
+    def release_idempotency_key(self, key: str):
+        """Drop a claim whose run failed so a retry can run again"""
+        if self.idempotency_col is None:
+            return
+        try:
+            self.idempotency_col.delete_one({"_id": key, "status": "running"})
+        except Exception as e:
+            print(f"❌ Error releasing idempotency key: {e}")
+    
+    def update_rollups(self, lead: Dict[str, Any]):
+        """Incrementally add a saved lead to every time-bucketed rollup"""
+        if self.rollups_col is None:
+            return
+        
+        try:
+            processed_at = lead.get("processed_at") or datetime.utcnow()
+            # One round trip for all three buckets
+            self.rollups_col.bulk_write(rollup_updates(processed_at, rollup_increments(lead)), ordered=False)
+        except Exception as e:
+            print(f"❌ Error updating rollups: {e}")
+    
+    def get_stats_timeseries(self, bucket: str = "day", limit: int = 30) -> List[Dict[str, Any]]:
+        """Read the most recent rollup buckets, oldest first"""
+        if bucket not in ROLLUP_BUCKETS:
+            raise ValueError(f"Unsupported bucket: {bucket}")
+        if self.rollups_col is None:
+            return []
+        
+        try:
+            limit = max(1, min(limit, MAX_ROLLUP_POINTS))
+            cursor = self.rollups_col.find(
+                {"bucket": bucket}, {"_id": False, "bucket": False}
+            ).sort("start", -1).limit(limit)
+            points = list(cursor)
+            points.reverse()
+            for point in points:
+                point.setdefault("deals", 0)
+                point.setdefault("total_value", 0)
+                point.setdefault("by_stage", {})
+                point.setdefault("competitors", {})
+            return points
+        except Exception as e:
+            print(f"❌ Error getting timeseries stats: {e}")
+            return []
+    
     def get_leads(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Retrieve leads from MongoDB"""
         if self.leads_col is None:
@@ -103,7 +292,8 @@ class DatabaseManager:
             if limit:
                 cursor = cursor.limit(limit)
             
-            leads = list(cursor.sort("created_at", -1))
+            # _id order is insertion order for both storage formats
+            leads = [expand_lead(doc) for doc in cursor.sort("_id", -1)]
             print(f"✅ Retrieved {len(leads)} leads from database")
             return leads
         except Exception as e:
@@ -2,85 +2,83 @@ import os
 import json
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import time
 
-# Load environment variables
+# Load environment variables before the local modules below read their config
 load_dotenv()
 
-# Initialize ChatOpenAI with updated import and error handling
+from llm_replay import LLM_REPLAY_MODE, wrap_llm
+from profiling import span
+from prompt_templates import DEFAULT_TEMPLATE_VERSION, MAX_INPUT_TOKENS, get_prompt, prompt_overhead_tokens, fit_to_budget
+
+# Model tiers: every request tries the fast model first and escalates to the
+# strong model on low confidence or invalid JSON
 model_name = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+fast_model_name = os.getenv("OPENAI_FAST_MODEL", model_name)
+strong_model_name = os.getenv("OPENAI_STRONG_MODEL", model_name)
+escalation_threshold = float(os.getenv("ESCALATION_CONFIDENCE_THRESHOLD", "0.3"))
 
 # Check if OpenAI API key is available
 openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    print("Warning: OPENAI_API_KEY not found in environment variables")
-    llm = None
-else:
+
+def _build_llm(name: str):
+    """Initialize ChatOpenAI for one model, or None if unavailable"""
+    if not openai_api_key:
+        return None
     try:
         llm = ChatOpenAI(
-            model=model_name, 
+            model=name, 
             temperature=0,
             openai_api_key=openai_api_key,
             request_timeout=60,  # 60 second timeout for OpenAI requests
             max_retries=2
         )
-        print(f"✅ ChatOpenAI initialized with model: {model_name}")
+        print(f"✅ ChatOpenAI initialized with model: {name}")
+        return llm
     except Exception as e:
         print(f"❌ Failed to initialize ChatOpenAI: {e}")
-        llm = None
+        return None
 
-# Improved prompt template for more reliable JSON extraction
-template = '''
-You are a CRM data extraction expert. Extract information from the meeting summary and return ONLY valid JSON.
+def _build_tier(tier: str, name: str) -> Dict[str, Any]:
+    """Build one model tier on the shared compiled prompt; the chain returns
+    the full message so we can read token usage from it"""
+    llm = wrap_llm(name, _build_llm(name))
+    prompt = get_prompt(template_version)
+    return {
+        "tier": tier,
+        "model": name,
+        "llm": llm,
+        "chain": prompt | llm if llm else None
+    }
 
-Required JSON structure:
-{{
-  "contact": {{
-    "name": "string or null",
-    "title": "string or null", 
-    "email": "string or null",
-    "phone": "string or null"
-  }},
-  "company": {{
-    "name": "string or null",
-    "industry": "string or null",
-    "size": "string or null",
-    "budget": "string or null"
-  }},
-  "deal": {{
-    "value": "string or null",
-    "stage": "string or null", 
-    "timeline": "string or null",
-    "competitor": "string or null",
-    "next_action": "string or null"
-  }}
-}}
+if not openai_api_key and LLM_REPLAY_MODE != "replay":
+    print("Warning: OPENAI_API_KEY not found in environment variables")
 
-Rules:
-- Return ONLY the JSON object, no other text
-- Use null for missing information
-- Ensure all JSON is properly formatted
-- Extract information accurately from the context
-- For deal value, extract only the numeric value without currency symbols
+template_version = DEFAULT_TEMPLATE_VERSION
+tiers = [_build_tier("fast", fast_model_name)]
+if strong_model_name != fast_model_name:
+    tiers.append(_build_tier("strong", strong_model_name))
 
-Meeting Summary:
-{text}
-'''
+REQUIRED_KEYS = ["contact", "company", "deal"]
 
-# Initialize chain only if LLM is available
-if llm:
-    prompt = PromptTemplate(template=template, input_variables=["text"])
-    chain = LLMChain(llm=llm, prompt=prompt)
-else:
-    prompt = None
-    chain = None
+def _token_usage(tier: Dict[str, Any], message: Any, estimated_prompt_tokens: int, truncated: bool) -> Dict[str, Any]:
+    """Read prompt/completion token usage reported by OpenAI for one call"""
+    usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    return {
+        "template_version": template_version,
+        "model": tier["model"],
+        "tier": tier["tier"],
+        "estimated_prompt_tokens": estimated_prompt_tokens,
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "total_tokens": usage.get("total_tokens"),
+        "truncated": truncated
+    }
 
-def extract_entities(text: str) -> Dict[str, Any]:
-    """Extract CRM entities and return JSON dict, or error dict on failure."""
-    if not chain or not llm:
+def _extract_with_tier(tier: Dict[str, Any], text: str) -> Dict[str, Any]:
+    """Run one extraction against a single model tier"""
+    if not tier["chain"]:
         return {
             "error": "OpenAI not configured. Please check OPENAI_API_KEY environment variable.",
             "contact": {},
@@ -88,17 +86,32 @@ def extract_entities(text: str) -> Dict[str, Any]:
             "deal": {}
         }
     
+    response = ""
+    usage = None
     try:
-        print(f"🔍 Extracting entities from text: {text[:100]}...")
+        print(f"🔍 Extracting entities with {tier['model']} from text: {text[:100]}...")
+        
+        # Count tokens locally and keep the input within budget before sending
+        with span(f"token_budget:{tier['tier']}"):
+            text, input_tokens, truncated = fit_to_budget(text, tier["model"], MAX_INPUT_TOKENS)
+        if truncated:
+            print(f"✂️ Input truncated to {MAX_INPUT_TOKENS} tokens")
+        estimated_prompt_tokens = prompt_overhead_tokens(template_version, tier["model"]) + input_tokens
+        
         start_time = time.time()
         
-        response = chain.run(text=text)
+        with span(f"llm_call:{tier['tier']}"):
+            message = tier["chain"].invoke({"text": text})
         
         end_time = time.time()
         print(f"⏱️ OpenAI processing took {end_time - start_time:.2f} seconds")
         
+        usage = _token_usage(tier, message, estimated_prompt_tokens, truncated)
+        print(f"🧮 Token usage: {usage['prompt_tokens']} prompt / {usage['completion_tokens']} completion "
+              f"(estimated prompt: {estimated_prompt_tokens})")
+        
         # Clean the response - remove any markdown formatting or extra text
-        response = response.strip()
+        response = message.content.strip()
         if response.startswith('```json'):
             response = response[7:]
         if response.endswith('```'):
@@ -108,23 +121,30 @@ def extract_entities(text: str) -> Dict[str, Any]:
         print(f"📝 Raw LLM response: {response}")
         
         # Parse JSON
-        parsed_data = json.loads(response)
+        with span(f"json_parse:{tier['tier']}"):
+            parsed_data = json.loads(response)
+        if not isinstance(parsed_data, dict):
+            raise json.JSONDecodeError("Expected a JSON object", response, 0)
         
         # Validate structure
-        required_keys = ["contact", "company", "deal"]
-        for key in required_keys:
-            if key not in parsed_data:
+        for key in REQUIRED_KEYS:
+            if key not in parsed_data or parsed_data[key] is None:
                 parsed_data[key] = {}
+            elif not isinstance(parsed_data[key], dict):
+                raise json.JSONDecodeError(f"'{key}' must be an object", response, 0)
         
+        parsed_data["usage"] = usage
         print(f"✅ Successfully extracted entities: {parsed_data}")
         return parsed_data
         
     except json.JSONDecodeError as e:
         print(f"❌ JSON parsing error: {e}")
         print(f"Raw response: {response}")
+        # The call was still billed; keep its usage for the request totals
         return {
             "error": f"Invalid JSON response: {str(e)}", 
             "raw": response,
+            "usage": usage,
             "contact": {},
             "company": {},
             "deal": {}
@@ -138,6 +158,73 @@ def extract_entities(text: str) -> Dict[str, Any]:
             "deal": {}
         }
 
+def _combine_usage(result: Dict[str, Any], tier_usages: List[Dict[str, Any]]):
+    """Report token usage summed over every tier tried, plus the per-tier list"""
+    if not tier_usages:
+        return
+    
+    def total(field: str) -> Optional[int]:
+        values = [usage[field] for usage in tier_usages if usage.get(field) is not None]
+        return sum(values) if values else None
+    
+    usage = dict(result.get("usage") or tier_usages[-1])
+    usage.update({
+        "estimated_prompt_tokens": total("estimated_prompt_tokens") or 0,
+        "prompt_tokens": total("prompt_tokens"),
+        "completion_tokens": total("completion_tokens"),
+        "total_tokens": total("total_tokens"),
+        "tiers": tier_usages
+    })
+    result["usage"] = usage
+
+def extract_entities(text: str) -> Dict[str, Any]:
+    """Extract CRM entities and return JSON dict, or error dict on failure.
+    
+    Tries the fast tier first and escalates to the strong tier only when the
+    result is invalid or its confidence is below the threshold. If no tier
+    reaches the threshold, the highest-confidence valid result is returned.
+    """
+    result = None
+    best_confidence = -1.0
+    tier_usages = []
+    for i, tier in enumerate(tiers):
+        start_time = time.time()
+        attempt = _extract_with_tier(tier, text)
+        latency = time.time() - start_time
+        if attempt.get("usage"):
+            tier_usages.append(attempt["usage"])
+        
+        is_last = i == len(tiers) - 1
+        if "error" in attempt:
+            confidence = -1.0
+            reason = "invalid response"
+        else:
+            confidence = calculate_confidence(attempt)
+            if confidence >= escalation_threshold:
+                print(f"🧭 Routing: {tier['tier']} tier ({tier['model']}) accepted "
+                      f"in {latency:.2f}s with confidence {confidence}")
+                _combine_usage(attempt, tier_usages)
+                return attempt
+            reason = f"confidence {confidence} < {escalation_threshold}"
+        
+        # Keep the best result seen so far: highest confidence, errors last
+        if result is None or confidence > best_confidence:
+            result = attempt
+            best_confidence = confidence
+        
+        if is_last:
+            print(f"🧭 Routing: {tier['tier']} tier ({tier['model']}) finished "
+                  f"in {latency:.2f}s ({reason}), no higher tier")
+        else:
+            print(f"🧭 Routing: {tier['tier']} tier ({tier['model']}) took {latency:.2f}s, "
+                  f"escalating ({reason})")
+            # Stop escalating when the fast tier is not configured at all
+            if not tier["chain"]:
+                break
+    
+    _combine_usage(result, tier_usages)
+    return result
+
 def calculate_confidence(extracted_data: Dict[str, Any]) -> float:
     """Calculate confidence score based on extracted data completeness"""
     total_fields = 0
@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+def content_key(text: str) -> str:
+    """Fallback idempotency key when the client does not send one"""
+    return "sha256:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class SingleFlight:
+    """Coalesce concurrent identical calls and replay completed results.
+
+    Concurrent calls with the same key share one in-flight computation.
+    Successful results are kept for `ttl` seconds (at most `max_entries`),
+    so retries within that window return the stored result instead of
+    running again. Failures are never stored.
+    
+    That state is per process. With several workers, pass `shared` (the
+    DatabaseManager) plus `encode`/`decode` for results: a key is then also
+    claimed in MongoDB before running, and a worker that loses the claim
+    waits for the owner's stored result and replays it.
+    """
+    
+    def __init__(
+        self,
+        ttl: float = 600,
+        max_entries: int = 1000,
+        shared: Any = None,
+        encode: Callable[[Any], Dict[str, Any]] = lambda value: value,
+        decode: Callable[[Dict[str, Any]], Any] = lambda value: value,
+        lease: float = 300,
+        poll_interval: float = 0.5
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self.encode = encode
+        self.decode = decode
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._completed: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    def _get_completed(self, key: str) -> Optional[Any]:
+        entry = self._completed.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._completed[key]
+            return None
+        self._completed.move_to_end(key)
+        return value
+    
+    def _store(self, key: str, value: Any):
+        self._completed[key] = (time.monotonic(), value)
+        self._completed.move_to_end(key)
+        while len(self._completed) > self.max_entries:
+            self._completed.popitem(last=False)
+    
+    async def _claim_shared(self, key: str) -> Optional[Any]:
+        """Claim `key` in the shared store; returns another worker's result
+        instead if it has one, waiting while that worker is still running"""
+        loop = asyncio.get_running_loop()
+        while True:
+            claimed, stored = await loop.run_in_executor(None, self.shared.claim_idempotency_key, key, self.lease)
+            if claimed:
+                return None
+            if stored is not None:
+                return self.decode(stored)
+            await asyncio.sleep(self.poll_interval)
+    
+    async def run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        should_store: Callable[[Any], bool] = lambda _: True
+    ) -> Tuple[Any, bool]:
+        """Return (result, replayed); replayed is True if no new work was started"""
+        cached = self._get_completed(key)
+        if cached is not None:
+            return cached, True
+        
+        future = self._in_flight.get(key)
+        if future is not None:
+            return await asyncio.shield(future), True
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._in_flight[key] = future
+        claimed = False
+        try:
+            if self.shared is not None:
+                stored = await self._claim_shared(key)
+                if stored is not None:
+                    future.set_result(stored)
+                    self._store(key, stored)
+                    return stored, True
+                claimed = True
+            result = await fn()
+        except BaseException as e:
+            if claimed:
+                self.shared.release_idempotency_key(key)
+            future.set_exception(e)
+            # Mark retrieved so an unawaited shared failure is not logged
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if should_store(result):
+                self._store(key, result)
+                if claimed:
+                    await loop.run_in_executor(None, self.shared.complete_idempotency_key, key, self.encode(result))
+            elif claimed:
+                await loop.run_in_executor(None, self.shared.release_idempotency_key, key)
+            return result, False
+        finally:
+            self._in_flight.pop(key, None)
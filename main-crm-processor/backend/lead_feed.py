@@ -0,0 +1,109 @@
+import asyncio
+import os
+import threading
+from typing import Any, Dict, Optional, Set
+
+from database import db_manager
+from lead_schema import compact_lead, expand_lead, parse_deal_value
+from serialization import dumps
+
+# Messages buffered per WebSocket client before the oldest are dropped
+CLIENT_BUFFER_SIZE = int(os.getenv("LEAD_FEED_CLIENT_BUFFER", "100"))
+
+def _stats_delta(lead: Dict[str, Any]) -> Dict[str, Any]:
+    """Change to /api/stats totals caused by one new lead"""
+    deal_value = parse_deal_value((lead.get("deal") or {}).get("value"))
+    return {
+        "total_leads": 1,
+        "total_deals": 1 if deal_value is not None else 0,
+        "total_value": deal_value or 0
+    }
+
+class LeadFeed:
+    """Fan out newly saved leads to all connected dashboards.
+
+    One upstream subscription is shared by every client: a MongoDB change
+    stream when the deployment supports it (replica set / Atlas), otherwise
+    the in-process save_lead listener. Each event is serialized once and
+    pushed into bounded per-client queues; a slow client loses its oldest
+    messages instead of holding up the others.
+    """
+    
+    def __init__(self, buffer_size: int = CLIENT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.mode = "local"
+        self._clients: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stream = None
+        self._started = False
+    
+    def start(self, loop: asyncio.AbstractEventLoop):
+        if self._started:
+            return
+        self._started = True
+        self._loop = loop
+        db_manager.add_listener(self._on_local_save)
+        if db_manager.leads_col is not None:
+            threading.Thread(target=self._watch, name="lead-feed", daemon=True).start()
+    
+    def stop(self):
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+    
+    def _watch(self):
+        """Follow inserts through a change stream; fall back to local events"""
+        try:
+            pipeline = [{"$match": {"operationType": "insert"}}]
+            with db_manager.leads_col.watch(pipeline) as stream:
+                self._stream = stream
+                self.mode = "change_stream"
+                print("✅ Lead feed using MongoDB change stream")
+                for change in stream:
+                    self._publish(expand_lead(change["fullDocument"]))
+        except Exception as e:
+            if self.mode == "change_stream":
+                print(f"❌ Lead feed change stream closed: {e}")
+            else:
+                print(f"Lead feed using in-process events (change streams unavailable: {e})")
+        finally:
+            self._stream = None
+            self.mode = "local"
+    
+    def _on_local_save(self, lead: Dict[str, Any]):
+        # With a change stream, every worker's inserts already arrive through it
+        if self.mode == "local":
+            # Round-trip through the storage format so clients see the same
+            # shape as from the change stream and /api/leads
+            self._publish(expand_lead(compact_lead(lead)))
+    
+    def _publish(self, lead: Dict[str, Any]):
+        """Called from worker threads; hands the event to the event loop"""
+        if self._loop is None or not self._clients:
+            return
+        lead = {k: v for k, v in lead.items() if k != "_id"}
+        message = dumps({"type": "lead", "lead": lead, "stats_delta": _stats_delta(lead)})
+        self._loop.call_soon_threadsafe(self._broadcast, message)
+    
+    def _broadcast(self, message: bytes):
+        for queue in self._clients:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+    
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.buffer_size)
+        self._clients.add(queue)
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._clients.discard(queue)
+    
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+# Global feed instance
+lead_feed = LeadFeed()
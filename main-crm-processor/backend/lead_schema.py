@@ -0,0 +1,111 @@
+import math
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# Storage format version written by compact_lead. Documents without a
+# schema_version are the original verbose format.
+SCHEMA_VERSION = 2
+
+CONTACT_KEYS = ["name", "title", "email", "phone"]
+COMPANY_KEYS = ["name", "industry", "size", "budget"]
+DEAL_KEYS = ["value", "stage", "timeline", "competitor", "next_action"]
+SECTIONS = {"contact": CONTACT_KEYS, "company": COMPANY_KEYS, "deal": DEAL_KEYS}
+
+# PII spans are stored as [entity, start, end, score]
+PII_FIELDS = ["entity", "start", "end", "score"]
+
+def parse_deal_value(value: Any) -> Optional[float]:
+    """Convert a deal value like '50,000' or '$30K' into a number"""
+    if value is None or value == "" or value == "null":
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        text = str(value).strip().lower().replace(",", "").replace("$", "")
+        multiplier = 1
+        if text.endswith("k"):
+            multiplier, text = 1_000, text[:-1]
+        elif text.endswith("m"):
+            multiplier, text = 1_000_000, text[:-1]
+        try:
+            number = float(text) * multiplier
+        except ValueError:
+            return None
+    # "nan"/"inf" parse as floats but would poison $inc totals permanently
+    return number if math.isfinite(number) else None
+
+def _format_deal_value(value: Any) -> Optional[str]:
+    """Render a stored numeric deal value back to the API's string form"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return None if value is None else str(value)
+
+def lead_timestamp(doc: Dict[str, Any]) -> Optional[datetime]:
+    """When a lead was processed: its stored timestamp, else its ObjectId's
+    creation time (prototype leads carry no timestamp at all)"""
+    timestamp = doc.get("processed_at") or doc.get("created_at")
+    if timestamp is None and doc.get("_id") is not None and hasattr(doc["_id"], "generation_time"):
+        timestamp = doc["_id"].generation_time.replace(tzinfo=None)
+    return timestamp
+
+def compact_lead(lead: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a normalized lead into the compact storage format.
+    
+    Null fields and empty sections are omitted, PII spans become arrays,
+    deal.value is stored as a number when it parses (with the original text
+    in deal.value_text when the number would render differently), and only
+    processed_at is kept as the lead's timestamp.
+    """
+    doc = {"schema_version": SCHEMA_VERSION}
+    
+    pii = [[span.get(field) for field in PII_FIELDS] for span in lead.get("pii") or []]
+    if pii:
+        doc["pii"] = pii
+    
+    for section, keys in SECTIONS.items():
+        values = lead.get(section) or {}
+        compact = {k: values[k] for k in keys if values.get(k) not in (None, "", "null")}
+        if section == "deal" and "value" in compact:
+            number = parse_deal_value(compact["value"])
+            if number is not None:
+                if _format_deal_value(number) != str(compact["value"]):
+                    compact["value_text"] = compact["value"]
+                compact["value"] = number
+        if compact:
+            doc[section] = compact
+    
+    doc["confidence"] = lead.get("confidence", 0.0)
+    doc["processed_at"] = lead_timestamp(lead) or datetime.utcnow()
+    
+    usage = {k: v for k, v in (lead.get("usage") or {}).items() if v is not None}
+    if usage:
+        doc["usage"] = usage
+    if "_id" in lead:
+        doc["_id"] = lead["_id"]
+    return doc
+
+def expand_lead(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand a stored lead (either format) to the full LeadResponse shape"""
+    if doc.get("schema_version") != SCHEMA_VERSION:
+        return doc
+    
+    lead = {
+        "pii": [dict(zip(PII_FIELDS, span)) for span in doc.get("pii", [])],
+    }
+    for section, keys in SECTIONS.items():
+        values = doc.get(section) or {}
+        lead[section] = {k: values.get(k) for k in keys}
+    deal = doc.get("deal") or {}
+    lead["deal"]["value"] = deal.get("value_text") or _format_deal_value(deal.get("value"))
+    
+    lead["confidence"] = doc.get("confidence", 0.0)
+    lead["processed_at"] = doc.get("processed_at")
+    # Kept in responses for existing clients; no longer stored separately
+    lead["created_at"] = doc.get("processed_at")
+    if doc.get("usage"):
+        lead["usage"] = doc["usage"]
+    if "_id" in doc:
+        lead["_id"] = doc["_id"]
+    return lead
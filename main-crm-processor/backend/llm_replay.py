@@ -0,0 +1,109 @@
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+# Load environment variables (this module may be imported before any other
+# module has loaded .env)
+load_dotenv()
+
+# LLM_REPLAY_MODE: "off" (live OpenAI), "record" (live, saving every call to
+# LLM_FIXTURES) or "replay" (serve saved responses, no network or API key)
+LLM_REPLAY_MODE = os.getenv("LLM_REPLAY_MODE", "off")
+LLM_FIXTURES = os.getenv("LLM_FIXTURES", "fixtures/llm_calls.jsonl")
+# "recorded" sleeps for each call's recorded latency; "fast" returns at once
+LLM_REPLAY_SPEED = os.getenv("LLM_REPLAY_SPEED", "recorded")
+# On a replay miss: "error", or "any" to cycle through recorded calls (load tests)
+LLM_REPLAY_MISS = os.getenv("LLM_REPLAY_MISS", "error")
+
+def request_key(model: str, prompt_text: str) -> str:
+    return hashlib.sha256(f"{model}\n{prompt_text}".encode("utf-8")).hexdigest()
+
+class LLMRecorder:
+    """Wrap a chat model so every call is appended to a JSONL fixture file"""
+    
+    def __init__(self, path: str = LLM_FIXTURES):
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def wrap(self, model: str, llm) -> RunnableLambda:
+        def call(prompt_value) -> AIMessage:
+            prompt_text = prompt_value.to_string()
+            start = time.perf_counter()
+            message = llm.invoke(prompt_value)
+            latency = time.perf_counter() - start
+            self._append({
+                "key": request_key(model, prompt_text),
+                "model": model,
+                "latency_seconds": round(latency, 4),
+                "content": message.content,
+                "response_metadata": message.response_metadata,
+                "recorded_at": time.time()
+            })
+            return message
+        return RunnableLambda(call)
+    
+    def _append(self, record: Dict[str, Any]):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+class LLMReplayer:
+    """Serve recorded responses in place of a live chat model"""
+    
+    def __init__(self, path: str = LLM_FIXTURES, speed: str = LLM_REPLAY_SPEED, miss: str = LLM_REPLAY_MISS):
+        self.speed = speed
+        self.miss = miss
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self._all: List[Dict[str, Any]] = []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.records[record["key"]] = record
+                        self._all.append(record)
+        self._cycle = itertools.cycle(self._all) if self._all else None
+        self._lock = threading.Lock()
+        print(f"🎞️ LLM replay: {len(self.records)} recorded calls from {path} ({speed} speed)")
+    
+    def _lookup(self, model: str, prompt_text: str) -> Optional[Dict[str, Any]]:
+        record = self.records.get(request_key(model, prompt_text))
+        if record is None and self.miss == "any" and self._cycle is not None:
+            with self._lock:
+                record = next(self._cycle)
+        return record
+    
+    def wrap(self, model: str) -> RunnableLambda:
+        def call(prompt_value) -> AIMessage:
+            record = self._lookup(model, prompt_value.to_string())
+            if record is None:
+                raise LookupError(f"No recorded LLM response for this prompt ({model})")
+            if self.speed == "recorded":
+                time.sleep(record["latency_seconds"])
+            return AIMessage(content=record["content"], response_metadata=record.get("response_metadata") or {})
+        return RunnableLambda(call)
+
+_recorder = None
+_replayer = None
+
+def wrap_llm(model: str, llm):
+    """Apply the configured record/replay mode to a tier's chat model"""
+    global _recorder, _replayer
+    if LLM_REPLAY_MODE == "replay":
+        if _replayer is None:
+            _replayer = LLMReplayer()
+        return _replayer.wrap(model)
+    if LLM_REPLAY_MODE == "record" and llm is not None:
+        if _recorder is None:
+            _recorder = LLMRecorder()
+        return _recorder.wrap(model, llm)
+    return llm
@@ -1,13 +1,61 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, UploadFile, File, Form, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from typing import List, Dict, Any, Optional
+import asyncio
+import hashlib
+import re
+import time
+import tempfile
+import threading
 import uvicorn
 import os
 
 from models import ProcessingRequest, ProcessingResponse, LeadResponse
 from processor import process_meeting_summary
-from database import db_manager
+from database import db_manager, ROLLUP_BUCKETS
+from serialization import FastJSONResponse
+from idempotency import SingleFlight, content_key
+from bulk_ingest import JobLock, ingest_file, read_job_status
+from lead_feed import lead_feed
+from archive import read_archived_leads, MAX_ARCHIVE_READ
+from admission import AdmissionController, Overloaded
+from profiling import profiler
+
+# Blocking extraction work (Presidio, OpenAI, MongoDB) runs off the event loop
+extraction_workers = int(os.getenv("EXTRACTION_WORKERS", "4"))
+extraction_executor = ThreadPoolExecutor(max_workers=extraction_workers, thread_name_prefix="extract")
+
+# Shed extraction load early instead of letting requests pile up and time out.
+# Only /api/process is admission-controlled; health and read endpoints are not.
+admission = AdmissionController(
+    max_in_flight=int(os.getenv("MAX_IN_FLIGHT_EXTRACTIONS", str(extraction_workers))),
+    max_queue=int(os.getenv("MAX_QUEUED_EXTRACTIONS", str(extraction_workers * 2))),
+    max_wait=float(os.getenv("MAX_QUEUE_WAIT_SECONDS", "30"))
+)
+
+# One logical /api/process request -> one LLM call and one saved lead, across
+# all workers: keys are also claimed in MongoDB so a retry landing on another
+# worker replays the stored result
+process_flight = SingleFlight(
+    ttl=float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600")),
+    max_entries=int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "1000")),
+    shared=db_manager,
+    encode=lambda result: result.model_dump(),
+    decode=ProcessingResponse.model_validate,
+    lease=float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "300"))
+)
+
+# Bulk ingestion uploads and checkpoints live here; job id = file content hash,
+# so re-uploading an interrupted file resumes it. Job state is kept in the
+# checkpoint file and a per-job lock file, so every worker sees the same jobs.
+ingest_dir = os.getenv("INGEST_DIR", "ingest")
+
+def _ingest_checkpoint_path(job_id: str) -> str:
+    return os.path.join(ingest_dir, f"{job_id}.checkpoint.json")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -38,39 +86,94 @@ app.add_middleware(
 @app.get("/")
 async def root():
     """Health check endpoint"""
-    return {"message": "CRM Lead Processor API is running", "status": "healthy"}
+    return {
+        "message": "CRM Lead Processor API is running",
+        "status": "healthy",
+        "admission": admission.snapshot()
+    }
 
 @app.post("/api/process", response_model=ProcessingResponse)
-async def process_meeting(request: ProcessingRequest):
-    """Process meeting summary and extract CRM data"""
+async def process_meeting(
+    request: ProcessingRequest,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+    x_profile: Optional[str] = Header(default=None, alias="X-Profile")
+):
+    """Process meeting summary and extract CRM data.
+    
+    Retries with the same Idempotency-Key (or, without one, the same summary)
+    share an in-flight run and replay its result within the idempotency window.
+    Sending X-Profile with the configured PROFILE_TOKEN captures a profile of
+    this request, served at /api/debug/profiles.
+    """
+    profile = profiler.start("/api/process", x_profile)
     try:
         if not request.summary or not request.summary.strip():
             raise HTTPException(status_code=400, detail="Meeting summary cannot be empty")
         
-        print(f"Processing meeting summary: {request.summary[:100]}...")
-        result = process_meeting_summary(request.summary.strip())
+        summary = request.summary.strip()
+        key = content_key(summary)
+        if idempotency_key:
+            key = f"{idempotency_key}:{key}"
+        
+        work = partial(process_meeting_summary, summary)
+        if profile:
+            work = partial(profile.run, process_meeting_summary, summary)
+        
+        async def run():
+            wait_start = time.perf_counter()
+            async with admission.admit():
+                if profile:
+                    profile.add_span("admission_wait", wait_start, time.perf_counter())
+                print(f"Processing meeting summary: {summary[:100]}...")
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(extraction_executor, work)
+        
+        try:
+            result, replayed = await process_flight.run(key, run, should_store=lambda r: r.success)
+        except Overloaded as e:
+            print(f"Shedding request ({e.status_code}): {admission.snapshot()}")
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=e.detail,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        if replayed:
+            print(f"Replaying result for idempotency key {key[:40]}...")
         
         if not result.success:
             print(f"Processing failed: {result.error}")
             raise HTTPException(status_code=500, detail=result.error)
         
         print(f"Processing successful with confidence: {result.confidence}")
-        return result
+        headers = {"Idempotent-Replayed": "true" if replayed else "false"}
+        if profile:
+            headers["X-Profile-Id"] = profile.id
+        # Already validated when it was built; skip re-validation on the way out
+        with profile.span("serialize") if profile else nullcontext():
+            return FastJSONResponse(result.model_dump(), headers=headers)
         
     except HTTPException:
         raise
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        if profile:
+            profiler.finish(profile)
 
 @app.get("/api/leads", response_model=LeadResponse)
-async def get_leads(limit: int = None):
-    """Retrieve all stored leads"""
+async def get_leads(limit: int = None, include_archived: bool = False):
+    """Retrieve stored leads, optionally reading through to the archive"""
     try:
         print(f"Retrieving leads with limit: {limit}")
         leads = db_manager.get_leads(limit=limit)
+        if include_archived and (limit is None or len(leads) < limit):
+            # Archive read-through is always bounded, even without a limit
+            remaining = MAX_ARCHIVE_READ if limit is None else limit - len(leads)
+            leads.extend(read_archived_leads(limit=remaining))
         print(f"Retrieved {len(leads)} leads")
-        return LeadResponse(leads=leads, total=len(leads))
+        # Trusted DB documents: serialize directly instead of validating each one
+        return FastJSONResponse({"leads": leads, "total": len(leads)})
     except Exception as e:
         print(f"Error retrieving leads: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve leads: {str(e)}")
@@ -87,6 +190,121 @@ async def get_stats():
         print(f"Error retrieving stats: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve stats: {str(e)}")
 
+@app.get("/api/stats/timeseries")
+async def get_stats_timeseries(bucket: str = "day", limit: int = 30):
+    """Get time-bucketed statistics from the incremental rollups"""
+    if bucket not in ROLLUP_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of: {', '.join(ROLLUP_BUCKETS)}")
+    
+    try:
+        points = db_manager.get_stats_timeseries(bucket=bucket, limit=limit)
+        return {"bucket": bucket, "points": points}
+    except Exception as e:
+        print(f"Error retrieving timeseries stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve timeseries stats: {str(e)}")
+
+@app.post("/api/ingest")
+async def start_ingest(
+    file: UploadFile = File(...),
+    column: str = Form("summary"),
+    pii_concurrency: int = Form(4),
+    llm_concurrency: int = Form(8),
+    db_concurrency: int = Form(4),
+    retry_failed: bool = Form(False)
+):
+    """Upload a CSV/JSONL file of summaries and ingest it in the background"""
+    fmt = "csv" if (file.filename or "").lower().endswith(".csv") else "jsonl"
+    os.makedirs(ingest_dir, exist_ok=True)
+    
+    # Stream the upload to disk in chunks, hashing as we go
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=ingest_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as out:
+        while chunk := await file.read(1024 * 1024):
+            digest.update(chunk)
+            out.write(chunk)
+    job_id = digest.hexdigest()[:16]
+    path = os.path.join(ingest_dir, f"{job_id}.{fmt}")
+    os.replace(tmp_path, path)
+    
+    checkpoint_path = _ingest_checkpoint_path(job_id)
+    # Taken here rather than in the thread so a concurrent re-upload, on this
+    # or any other worker, reports the running job instead of starting it twice
+    lock = JobLock(f"{checkpoint_path}.lock")
+    if not lock.acquire():
+        return {"job_id": job_id, "status": read_job_status(checkpoint_path) or {"running": True}}
+    
+    job = {"filename": file.filename, "finished": False}
+    
+    def run():
+        try:
+            ingest_file(
+                path,
+                fmt=fmt,
+                column=column,
+                pii_concurrency=pii_concurrency,
+                llm_concurrency=llm_concurrency,
+                db_concurrency=db_concurrency,
+                checkpoint_path=checkpoint_path,
+                status=job,
+                quiet=True,
+                retry_failed=retry_failed,
+                lock=lock
+            )
+        except Exception as e:
+            print(f"❌ Ingestion job {job_id} failed: {e}")
+    
+    threading.Thread(target=run, name=f"ingest-{job_id}", daemon=True).start()
+    print(f"🚚 Started ingestion job {job_id} for {file.filename}")
+    return {"job_id": job_id, "status": job}
+
+@app.get("/api/ingest/{job_id}")
+async def get_ingest_status(job_id: str):
+    """Get live progress of a bulk ingestion job"""
+    job = None
+    if re.fullmatch(r"[0-9a-f]{16}", job_id):
+        job = read_job_status(_ingest_checkpoint_path(job_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return {"job_id": job_id, "status": job}
+
+@app.websocket("/ws/leads")
+async def leads_feed(websocket: WebSocket):
+    """Push newly saved leads and stats deltas to the dashboard"""
+    await websocket.accept()
+    queue = lead_feed.subscribe()
+    print(f"Lead feed client connected ({lead_feed.client_count} total, mode: {lead_feed.mode})")
+    
+    async def send_events():
+        while True:
+            message = await queue.get()
+            await websocket.send_text(message.decode("utf-8"))
+    
+    async def wait_for_disconnect():
+        # Clients don't send anything; this returns as soon as they go away
+        while True:
+            await websocket.receive_text()
+    
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, WebSocketDisconnect):
+                print(f"Lead feed client error: {str(error)}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        lead_feed.unsubscribe(queue)
+        print(f"Lead feed client disconnected ({lead_feed.client_count} remaining)")
+
+@app.get("/api/debug/profiles")
+async def get_profiles(x_profile: Optional[str] = Header(default=None, alias="X-Profile")):
+    """Most recent request profiles (requires X-Profile: <PROFILE_TOKEN>)"""
+    if not profiler.is_authorized(x_profile):
+        raise HTTPException(status_code=404, detail="Not found")
+    return FastJSONResponse({"profiles": profiler.list()})
+
 @app.delete("/api/leads")
 async def clear_leads():
     """Clear all leads (for testing purposes)"""
@@ -94,6 +312,8 @@ async def clear_leads():
         print("Clearing all leads...")
         if db_manager.leads_col:
             result = db_manager.leads_col.delete_many({})
+            if db_manager.rollups_col is not None:
+                db_manager.rollups_col.delete_many({})
             print(f"Deleted {result.deleted_count} leads")
             return {"message": f"Deleted {result.deleted_count} leads"}
         else:
@@ -125,6 +345,20 @@ async def startup_event():
         print("✅ Database connection established")
     else:
         print("❌ Database connection failed")
+    
+    lead_feed.start(asyncio.get_running_loop())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drain in-flight extractions before the worker exits"""
+    print("🛑 Shutting down, waiting for in-flight extractions to finish...")
+    lead_feed.stop()
+    await asyncio.get_running_loop().run_in_executor(
+        None, lambda: extraction_executor.shutdown(wait=True)
+    )
+    if db_manager.client:
+        db_manager.client.close()
+    print("✅ Shutdown complete")
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Convert stored leads to the compact storage format (lead_schema.SCHEMA_VERSION)
+
+Usage: python migrate_leads.py [--batch-size 500] [--dry-run]
+
+Safe to re-run: documents already in the current format are skipped, and
+each document keeps its _id.
+"""
+import argparse
+from pymongo import ReplaceOne
+
+from database import db_manager
+from lead_schema import SCHEMA_VERSION, compact_lead
+from serialization import dumps
+
+def migrate(batch_size: int = 500, dry_run: bool = False) -> dict:
+    if db_manager.leads_col is None:
+        print("❌ Database not connected")
+        return {"migrated": 0, "bytes_before": 0, "bytes_after": 0}
+    
+    query = {"schema_version": {"$ne": SCHEMA_VERSION}}
+    migrated = 0
+    bytes_before = 0
+    bytes_after = 0
+    batch = []
+    
+    def flush():
+        if batch and not dry_run:
+            db_manager.leads_col.bulk_write(batch, ordered=False)
+        batch.clear()
+    
+    for doc in db_manager.leads_col.find(query).batch_size(batch_size):
+        compact = compact_lead(doc)
+        bytes_before += len(dumps(doc))
+        bytes_after += len(dumps(compact))
+        batch.append(ReplaceOne({"_id": doc["_id"]}, compact))
+        migrated += 1
+        if len(batch) >= batch_size:
+            flush()
+            print(f"   {migrated} leads converted...")
+    flush()
+    
+    saved = 100 * (1 - bytes_after / bytes_before) if bytes_before else 0
+    action = "Would convert" if dry_run else "Converted"
+    print(f"✅ {action} {migrated} leads; JSON size {bytes_before} -> {bytes_after} bytes ({saved:.1f}% smaller)")
+    return {"migrated": migrated, "bytes_before": bytes_before, "bytes_after": bytes_after}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without writing")
+    args = parser.parse_args()
+    migrate(batch_size=args.batch_size, dry_run=args.dry_run)
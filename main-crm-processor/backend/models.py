@@ -27,6 +27,18 @@ class Deal(BaseModel):
     competitor: Optional[str] = None
     next_action: Optional[str] = None
 
+class TokenUsage(BaseModel):
+    template_version: str
+    model: str
+    tier: Optional[str] = None
+    estimated_prompt_tokens: int
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+    truncated: bool = False
+    # Per-tier usage when extraction escalated; the totals above cover all tiers
+    tiers: Optional[List[Dict[str, Any]]] = None
+
 class ProcessingRequest(BaseModel):
     summary: str
 
@@ -39,6 +51,7 @@ class ProcessingResponse(BaseModel):
     processed_at: datetime
     success: bool
     error: Optional[str] = None
+    usage: Optional[TokenUsage] = None
 
 class LeadResponse(BaseModel):
     leads: List[Dict[str, Any]]
@@ -1,9 +1,11 @@
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pii_detector import detect_pii
 from entity_extractor import extract_entities, calculate_confidence
 from database import db_manager
-from models import ProcessingResponse, PIIEntity, Contact, Company, Deal
+from models import ProcessingResponse, PIIEntity, Contact, Company, Deal, TokenUsage
+from profiling import span
 
 # Normalization helper
 CONTACT_KEYS = ["name", "title", "email", "phone"]
@@ -16,7 +18,7 @@ def normalize_schema(data: Dict[str, Any]) -> Dict[str, Any]:
     company = data.get("company") or {}
     deal = data.get("deal") or {}
     
-    return {
+    normalized = {
         "pii": data.get("pii", []),
         "contact": {k: contact.get(k) for k in CONTACT_KEYS},
         "company": {k: company.get(k) for k in COMPANY_KEYS},
@@ -24,15 +26,25 @@ def normalize_schema(data: Dict[str, Any]) -> Dict[str, Any]:
         "confidence": data.get("confidence", 0.0),
         "processed_at": data.get("processed_at", datetime.utcnow())
     }
+    if data.get("usage"):
+        normalized["usage"] = data["usage"]
+    return normalized
 
-def process_meeting_summary(summary: str) -> ProcessingResponse:
-    """Process meeting summary through all steps and return normalized data"""
+def process_meeting_summary(summary: str, limits: Optional[Dict[str, Any]] = None) -> ProcessingResponse:
+    """Process meeting summary through all steps and return normalized data.
+    
+    `limits` optionally maps "pii", "llm" and "db" to semaphores (or any
+    context manager) that bound how many callers run each stage at once.
+    """
+    limits = limits or {}
     try:
         print("Step 1: Detecting PII...")
-        pii_data = detect_pii(summary)
+        with limits.get("pii") or nullcontext(), span("pii_detection"):
+            pii_data = detect_pii(summary)
         
         print("Step 2: Extracting entities...")
-        entities_result = extract_entities(summary)
+        with limits.get("llm") or nullcontext(), span("entity_extraction"):
+            entities_result = extract_entities(summary)
         
         # Handle extraction errors
         if isinstance(entities_result, dict) and "error" in entities_result:
@@ -57,27 +69,32 @@ def process_meeting_summary(summary: str) -> ProcessingResponse:
             "company": entities_result.get("company", {}),
             "deal": entities_result.get("deal", {}),
             "confidence": confidence,
-            "processed_at": datetime.utcnow()
+            "processed_at": datetime.utcnow(),
+            "usage": entities_result.get("usage")
         }
         
         print("Step 3: Normalizing and saving...")
-        normalized = normalize_schema(combined_data)
+        with span("normalize"):
+            normalized = normalize_schema(combined_data)
         
         # Save to database
-        save_result = db_manager.save_lead(normalized)
+        with limits.get("db") or nullcontext(), span("db_save"):
+            save_result = db_manager.save_lead(normalized)
         if save_result.startswith("error"):
             print(f"Warning: Failed to save to database: {save_result}")
         
         # Convert to response model
-        return ProcessingResponse(
-            pii=[PIIEntity(**item) for item in pii_data],
-            contact=Contact(**normalized["contact"]),
-            company=Company(**normalized["company"]),
-            deal=Deal(**normalized["deal"]),
-            confidence=confidence,
-            processed_at=normalized["processed_at"],
-            success=True
-        )
+        with span("response_model"):
+            return ProcessingResponse(
+                pii=[PIIEntity(**item) for item in pii_data],
+                contact=Contact(**normalized["contact"]),
+                company=Company(**normalized["company"]),
+                deal=Deal(**normalized["deal"]),
+                confidence=confidence,
+                processed_at=normalized["processed_at"],
+                success=True,
+                usage=TokenUsage(**normalized["usage"]) if normalized.get("usage") else None
+            )
         
     except Exception as e:
         print(f"Processing error: {e}")
@@ -0,0 +1,145 @@
+import contextvars
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+# Load environment variables (this module may be imported before any other
+# module has loaded .env)
+load_dotenv()
+
+# Profiling is off unless a request sends X-Profile: <PROFILE_TOKEN> or is
+# picked by PROFILE_SAMPLE_RATE (0.0 - 1.0)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "50"))
+SAMPLE_INTERVAL_SECONDS = 0.005
+TOP_STACKS = 30
+
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar("profile", default=None)
+_noop = nullcontext()
+
+def span(name: str):
+    """Time a pipeline stage for the current profiled request; no-op otherwise"""
+    profile = _current.get()
+    if profile is None:
+        return _noop
+    return profile.span(name)
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+class RequestProfile:
+    """Per-stage spans and a sampled call-stack profile for one request"""
+    
+    def __init__(self, endpoint: str, reason: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.endpoint = endpoint
+        self.reason = reason
+        self.started_at = datetime.utcnow()
+        self.spans: List[Dict[str, Any]] = []
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._start = time.perf_counter()
+        self.duration_ms = None
+    
+    def add_span(self, name: str, start: float, end: float):
+        """Record a stage timed with time.perf_counter()"""
+        self.spans.append({
+            "name": name,
+            "start_ms": round((start - self._start) * 1000, 2),
+            "duration_ms": round((end - start) * 1000, 2)
+        })
+    
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter())
+    
+    def _sample(self, thread_id: int, done: threading.Event):
+        while not done.wait(SAMPLE_INTERVAL_SECONDS):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+    
+    def run(self, fn: Callable, *args, **kwargs):
+        """Call fn on this thread with spans enabled and a stack sampler attached"""
+        done = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample, args=(threading.get_ident(), done), name=f"profile-{self.id}", daemon=True
+        )
+        token = _current.set(self)
+        sampler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            done.set()
+            sampler.join()
+            _current.reset(token)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "endpoint": self.endpoint,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "spans": self.spans,
+            "sample_interval_ms": SAMPLE_INTERVAL_SECONDS * 1000,
+            "sample_count": self.sample_count,
+            "top_stacks": [
+                {"stack": stack, "samples": count}
+                for stack, count in self.samples.most_common(TOP_STACKS)
+            ]
+        }
+
+class Profiler:
+    """Decides which requests to profile and keeps the latest results"""
+    
+    def __init__(self, token: Optional[str] = PROFILE_TOKEN, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 buffer_size: int = PROFILE_BUFFER_SIZE):
+        self.token = token
+        self.sample_rate = sample_rate
+        self.profiles = deque(maxlen=buffer_size)
+    
+    def is_authorized(self, header_value: Optional[str]) -> bool:
+        if not self.token or header_value is None:
+            return False
+        # Constant-time comparison so the token can't be guessed by timing
+        return hmac.compare_digest(header_value.encode("utf-8"), self.token.encode("utf-8"))
+    
+    def start(self, endpoint: str, header_value: Optional[str]) -> Optional[RequestProfile]:
+        if self.is_authorized(header_value):
+            return RequestProfile(endpoint, "header")
+        if self.sample_rate and random.random() < self.sample_rate:
+            return RequestProfile(endpoint, "sampled")
+        return None
+    
+    def finish(self, profile: RequestProfile):
+        profile.duration_ms = round((time.perf_counter() - profile._start) * 1000, 2)
+        self.profiles.append(profile)
+        print(f"🔬 Profile {profile.id} captured for {profile.endpoint} ({profile.duration_ms} ms)")
+    
+    def list(self) -> List[Dict[str, Any]]:
+        return [profile.to_dict() for profile in reversed(self.profiles)]
+
+# Global profiler instance
+profiler = Profiler()
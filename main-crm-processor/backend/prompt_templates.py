@@ -0,0 +1,132 @@
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+import tiktoken
+from dotenv import load_dotenv
+from langchain.prompts import PromptTemplate
+
+# Load environment variables (this module may be imported before any other
+# module has loaded .env)
+load_dotenv()
+
+# Versioned extraction prompts. Bump the version when changing a template so
+# leads record which prompt produced them.
+TEMPLATES: Dict[str, str] = {
+    # Original verbose prompt
+    "v1": '''
+You are a CRM data extraction expert. Extract information from the meeting summary and return ONLY valid JSON.
+
+Required JSON structure:
+{{
+  "contact": {{
+    "name": "string or null",
+    "title": "string or null", 
+    "email": "string or null",
+    "phone": "string or null"
+  }},
+  "company": {{
+    "name": "string or null",
+    "industry": "string or null",
+    "size": "string or null",
+    "budget": "string or null"
+  }},
+  "deal": {{
+    "value": "string or null",
+    "stage": "string or null", 
+    "timeline": "string or null",
+    "competitor": "string or null",
+    "next_action": "string or null"
+  }}
+}}
+
+Rules:
+- Return ONLY the JSON object, no other text
+- Use null for missing information
+- Ensure all JSON is properly formatted
+- Extract information accurately from the context
+- For deal value, extract only the numeric value without currency symbols
+
+Meeting Summary:
+{text}
+''',
+    # Same instructions with the schema written compactly
+    "v2": '''Extract CRM data from the meeting summary. Return ONLY valid JSON, no other text:
+{{"contact":{{"name":s,"title":s,"email":s,"phone":s}},"company":{{"name":s,"industry":s,"size":s,"budget":s}},"deal":{{"value":s,"stage":s,"timeline":s,"competitor":s,"next_action":s}}}}
+s = string or null. Use null for missing information. Deal value: numeric only, no currency symbols.
+
+Meeting Summary:
+{text}''',
+}
+
+DEFAULT_TEMPLATE_VERSION = os.getenv("PROMPT_TEMPLATE_VERSION", "v2")
+MAX_INPUT_TOKENS = int(os.getenv("MAX_INPUT_TOKENS", "3000"))
+
+# Rough tokens-per-character ratio used when no tokenizer can be loaded
+CHARS_PER_TOKEN = 4
+
+_compiled: Dict[str, PromptTemplate] = {}
+_overheads: Dict[str, int] = {}
+_encodings: Dict[str, Optional[tiktoken.Encoding]] = {}
+_encoding_lock = threading.Lock()
+
+def _compact(template: str) -> str:
+    """Strip trailing spaces and blank-line runs that only cost tokens"""
+    lines = [line.rstrip() for line in template.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+def get_encoding(model_name: str) -> Optional[tiktoken.Encoding]:
+    """Return (and cache) the tokenizer for a model, or None if it can't load.
+    
+    tiktoken downloads encoding files on first use, so this is only called
+    when a request needs it, and a failed load (e.g. offline) is cached and
+    falls back to a character-based estimate instead of failing extraction.
+    """
+    if model_name not in _encodings:
+        with _encoding_lock:
+            if model_name not in _encodings:
+                try:
+                    try:
+                        encoding = tiktoken.encoding_for_model(model_name)
+                    except KeyError:
+                        encoding = tiktoken.get_encoding("o200k_base")
+                except Exception as e:
+                    print(f"Warning: tokenizer unavailable for {model_name}, estimating tokens: {e}")
+                    encoding = None
+                _encodings[model_name] = encoding
+    return _encodings[model_name]
+
+def count_tokens(text: str, model_name: str) -> int:
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+def get_prompt(version: str) -> PromptTemplate:
+    """Return the compiled prompt for a template version"""
+    if version not in _compiled:
+        if version not in TEMPLATES:
+            raise ValueError(f"Unknown prompt template version: {version}")
+        template = _compact(TEMPLATES[version])
+        _compiled[version] = PromptTemplate(template=template, input_variables=["text"])
+    return _compiled[version]
+
+def prompt_overhead_tokens(version: str, model_name: str) -> int:
+    """Tokens the prompt costs without any input text (counted on first use)"""
+    key = f"{version}:{model_name}"
+    if key not in _overheads:
+        _overheads[key] = count_tokens(get_prompt(version).format(text=""), model_name)
+    return _overheads[key]
+
+def fit_to_budget(text: str, model_name: str, max_tokens: int = MAX_INPUT_TOKENS) -> Tuple[str, int, bool]:
+    """Truncate text to max_tokens; returns (text, token_count, truncated)"""
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text, count_tokens(text, model_name), False
+        return text[:max_chars], max_tokens, True
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text, len(tokens), False
+    return encoding.decode(tokens[:max_tokens]), max_tokens, True
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Rebuild the time-bucketed lead_rollups collection from the leads collection
+
+Usage: python rebuild_rollups.py [--batch-size 1000]
+
+Use it once to backfill rollups for leads saved before they existed, or to
+repair them. Buckets are built in a scratch collection and swapped in at the
+end, so /api/stats/timeseries keeps serving the old rollups meanwhile. Leads
+saved while the rebuild runs may be missed; run it during a quiet period.
+"""
+import argparse
+from collections import defaultdict
+
+from database import db_manager, bucket_start, rollup_increments, ROLLUP_BUCKETS
+from lead_schema import lead_timestamp
+from pymongo import UpdateOne
+
+SCRATCH_COLLECTION = "lead_rollups_rebuild"
+
+def _is_value_field(field: str) -> bool:
+    return field == "total_value" or field.endswith(".value")
+
+def _merge_batch(docs: list) -> list:
+    """Combine the increments of a batch of leads into one upsert per bucket"""
+    merged = defaultdict(lambda: defaultdict(float))
+    for doc in docs:
+        processed_at = lead_timestamp(doc)
+        if processed_at is None:
+            continue
+        inc = rollup_increments(doc)
+        for bucket in ROLLUP_BUCKETS:
+            totals = merged[(bucket, bucket_start(processed_at, bucket))]
+            for field, value in inc.items():
+                totals[field] += value
+    
+    return [
+        UpdateOne(
+            {"bucket": bucket, "start": start},
+            # Counts stay integers; only value sums are fractional
+            {"$inc": {k: v if _is_value_field(k) else int(v) for k, v in totals.items()}},
+            upsert=True
+        )
+        for (bucket, start), totals in merged.items()
+    ]
+
+def _flush(scratch, batch: list):
+    updates = _merge_batch(batch)
+    if updates:
+        scratch.bulk_write(updates, ordered=False)
+    batch.clear()
+
+def rebuild(batch_size: int = 1000) -> int:
+    if db_manager.leads_col is None or db_manager.rollups_col is None:
+        print("❌ Database not connected")
+        return 0
+    
+    scratch = db_manager.db.get_collection(SCRATCH_COLLECTION)
+    scratch.drop()
+    scratch.create_index([("bucket", 1), ("start", -1)], unique=True)
+    
+    projection = {"processed_at": True, "created_at": True, "deal": True}
+    count = 0
+    batch = []
+    for doc in db_manager.leads_col.find({}, projection).batch_size(batch_size):
+        batch.append(doc)
+        count += 1
+        if len(batch) >= batch_size:
+            _flush(scratch, batch)
+            print(f"   {count} leads rolled up...")
+    _flush(scratch, batch)
+    
+    if count:
+        scratch.rename(db_manager.rollups_col.name, dropTarget=True)
+    else:
+        scratch.drop()
+        db_manager.rollups_col.delete_many({})
+    print(f"✅ Rebuilt rollups from {count} leads")
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    rebuild(batch_size=args.batch_size)
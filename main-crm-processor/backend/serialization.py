@@ -0,0 +1,33 @@
+import orjson
+from bson import ObjectId
+from decimal import Decimal
+from fastapi.responses import Response
+from typing import Any
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def _default(obj: Any) -> Any:
+    """Encode types orjson does not handle natively"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes; datetimes are encoded natively as ISO 8601"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+class FastJSONResponse(Response):
+    """JSON response that skips pydantic validation of trusted content.
+
+    Returning this from an endpoint bypasses FastAPI's response_model
+    validation, so only use it for data we built ourselves or read from
+    our own database.
+    """
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
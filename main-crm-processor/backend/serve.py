@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Production server runner for the CRM Processor API
+
+Runs gunicorn with uvicorn workers. The app (and with it the spaCy/Presidio
+models) is loaded once in the master before forking, so worker memory is
+shared copy-on-write. Each worker then opens its own MongoDB connection.
+"""
+import multiprocessing
+import os
+from dotenv import load_dotenv
+from gunicorn.app.base import BaseApplication
+
+# Load environment variables
+load_dotenv()
+
+def default_workers() -> int:
+    return min(multiprocessing.cpu_count() * 2 + 1, 8)
+
+def post_fork(server, worker):
+    """Reconnect MongoDB in each worker; clients must not be shared across fork"""
+    from database import db_manager
+    db_manager.reconnect()
+    print(f"✅ Worker {worker.pid} ready")
+
+class ProductionServer(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+    
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+    
+    def load(self):
+        # With preload_app this runs once in the master, before workers fork
+        from main import app
+        return app
+
+if __name__ == "__main__":
+    # Check for required environment variables
+    required_vars = ["OPENAI_API_KEY", "MONGO_URI"]
+    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    
+    if missing_vars:
+        print("❌ Missing required environment variables:")
+        for var in missing_vars:
+            print(f"   - {var}")
+        print("\nPlease create a .env file with the required variables.")
+        print("See .env.example for reference.")
+        exit(1)
+    
+    options = {
+        "bind": f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}",
+        "workers": int(os.getenv("WEB_WORKERS", default_workers())),
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": os.getenv("PRELOAD_APP", "true").lower() == "true",
+        # Time allowed for in-flight extractions to drain after SIGTERM
+        "graceful_timeout": int(os.getenv("GRACEFUL_TIMEOUT", "90")),
+        "timeout": int(os.getenv("WORKER_TIMEOUT", "120")),
+        "keepalive": 5,
+        "loglevel": os.getenv("LOG_LEVEL", "info"),
+        "post_fork": post_fork,
+    }
+    
+    print(f"🚀 Starting CRM Processor API with {options['workers']} workers...")
+    ProductionServer(options).run()
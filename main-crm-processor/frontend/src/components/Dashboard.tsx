@@ -47,6 +47,18 @@ export const Dashboard: React.FC<DashboardProps> = ({ onNewMeeting }) => {
     fetchData();
   }, []);
 
+  // Apply pushed leads and stats deltas instead of re-polling
+  useEffect(() => {
+    return apiService.subscribeToLeads(({ lead, stats_delta }) => {
+      setLeads((current) => [lead, ...current].slice(0, 10));
+      setStats((current) => ({
+        total_leads: current.total_leads + stats_delta.total_leads,
+        total_deals: current.total_deals + stats_delta.total_deals,
+        total_value: current.total_value + stats_delta.total_value,
+      }));
+    });
+  }, []);
+
   if (loading) {
     return (
       <div className="max-w-7xl mx-auto flex items-center justify-center py-16">
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { ProcessingRequest, ProcessingResponse, LeadResponse, Stats } from '../types/api';
+import type { ProcessingRequest, ProcessingResponse, LeadResponse, Stats, LeadFeedMessage } from '../types/api';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
 
@@ -102,6 +102,20 @@ export const apiService = {
       throw new Error(error.response?.data?.detail || error.message || 'Health check failed');
     }
   },
+
+  // Subscribe to newly saved leads; returns an unsubscribe function
+  subscribeToLeads: (onMessage: (message: LeadFeedMessage) => void): (() => void) => {
+    const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/ws/leads`);
+    socket.onmessage = (event) => {
+      try {
+        onMessage(JSON.parse(event.data));
+      } catch (error) {
+        console.error('Lead feed message error:', error);
+      }
+    };
+    socket.onerror = (error) => console.error('Lead feed error:', error);
+    return () => socket.close();
+  },
 };
 
 export default apiService;
\ No newline at end of file
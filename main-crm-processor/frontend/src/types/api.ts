@@ -27,6 +27,18 @@ export interface Deal {
   next_action?: string;
 }
 
+export interface TokenUsage {
+  template_version: string;
+  model: string;
+  tier?: string;
+  estimated_prompt_tokens: number;
+  prompt_tokens?: number;
+  completion_tokens?: number;
+  total_tokens?: number;
+  truncated: boolean;
+  tiers?: Omit<TokenUsage, 'tiers'>[];
+}
+
 export interface ProcessingRequest {
   summary: string;
 }
@@ -40,6 +52,7 @@ export interface ProcessingResponse {
   processed_at: string;
   success: boolean;
   error?: string;
+  usage?: TokenUsage;
 }
 
 export interface Lead {
@@ -50,6 +63,7 @@ export interface Lead {
   confidence: number;
   processed_at: string;
   created_at: string;
+  usage?: TokenUsage;
 }
 
 export interface LeadResponse {
@@ -61,4 +75,10 @@ export interface Stats {
   total_leads: number;
   total_deals: number;
   total_value: number;
-}
\ No newline at end of file
+}
+
+export interface LeadFeedMessage {
+  type: 'lead';
+  lead: Lead;
+  stats_delta: Stats;
+}
@@ -1,17 +1,10 @@
-import os
 import json
-from dotenv import load_dotenv
-from langchain.agents import initialize_agent, Tool, AgentType
-from langchain_community.chat_models.openai import ChatOpenAI
+from functools import lru_cache
+from llm_client import get_llm
 from extractor import extract_entities
 from pii_detector import detect_pii
 from db import save_lead, get_leads
 
-# Load environment
-load_dotenv()
-model_name = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-llm = ChatOpenAI(model=model_name, temperature=0)
-
 # Normalization helper
 CONTACT_KEYS = ["name", "title", "email", "phone"]
 COMPANY_KEYS = ["name", "industry", "size", "budget"]
@@ -69,19 +62,6 @@ def process_meeting_summary(summary: str) -> dict:
             "raw_summary": summary
         }
 
-# Tool definitions for agent (if still needed for other purposes)
-DetectPII = Tool(
-    name="DetectPII",
-    func=detect_pii,
-    description="Extract PII spans from text. Input: text string. Output: list of PII entities with positions."
-)
-
-ExtractEntities = Tool(
-    name="ExtractEntities", 
-    func=extract_entities,
-    description="Extract CRM contact, company, and deal info from text. Input: text string. Output: JSON with contact, company, deal keys."
-)
-
 def normalize_and_save_tool(json_input: str) -> str:
     """Tool wrapper that returns string for agent compatibility"""
     try:
@@ -94,21 +74,38 @@ def normalize_and_save_tool(json_input: str) -> str:
     except Exception as e:
         return json.dumps({"error": f"Processing error: {str(e)}"})
 
-NormalizeAndSave = Tool(
-    name="NormalizeAndSave",
-    func=normalize_and_save_tool,
-    description="Normalize CRM data and save to database. Input: JSON string with pii, contact, company, deal keys. Output: normalized data confirmation."
-)
-
 # Agent initialization (kept for compatibility but not used in main flow)
-agent = initialize_agent(
-    tools=[DetectPII, ExtractEntities, NormalizeAndSave],
-    llm=llm,
-    agent=AgentType.CHAT_ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=True,
-    max_iterations=3,
-    early_stopping_method="generate"
-)
+@lru_cache(maxsize=None)
+def get_agent():
+    """Build the tool-using agent on first use"""
+    from langchain.agents import initialize_agent, Tool, AgentType
+    
+    DetectPII = Tool(
+        name="DetectPII",
+        func=detect_pii,
+        description="Extract PII spans from text. Input: text string. Output: list of PII entities with positions."
+    )
+    
+    ExtractEntities = Tool(
+        name="ExtractEntities", 
+        func=extract_entities,
+        description="Extract CRM contact, company, and deal info from text. Input: text string. Output: JSON with contact, company, deal keys."
+    )
+    
+    NormalizeAndSave = Tool(
+        name="NormalizeAndSave",
+        func=normalize_and_save_tool,
+        description="Normalize CRM data and save to database. Input: JSON string with pii, contact, company, deal keys. Output: normalized data confirmation."
+    )
+    
+    return initialize_agent(
+        tools=[DetectPII, ExtractEntities, NormalizeAndSave],
+        llm=get_llm(),
+        agent=AgentType.CHAT_ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=True,
+        max_iterations=3,
+        early_stopping_method="generate"
+    )
 
 def run_agent(summary: str):
     """Main function that processes summary and returns results"""
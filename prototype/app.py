@@ -1,42 +1,75 @@
 import gradio as gr
-from agent_flow import run_agent
+from agent_flow import process_meeting_summary
+from db import get_leads_page, get_leads_since
 
-def handle_processing(summary):
+def format_deal_value(deal):
+    """Deal value as text; backend-saved leads store it as a number, with the
+    original wording (e.g. "$30K") in value_text when they differ"""
+    value = deal.get('value_text') or deal.get('value')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return 'N/A' if value is None else value
+
+def format_lead(lead):
+    """Convert a lead document into a dataframe row"""
+    contact = lead.get('contact') or {}
+    company = lead.get('company') or {}
+    deal = lead.get('deal') or {}
+    
+    return [
+        contact.get('name', 'N/A'),
+        contact.get('email', 'N/A'),
+        contact.get('phone', 'N/A'),
+        company.get('name', 'N/A'),
+        company.get('industry', 'N/A'),
+        format_deal_value(deal),
+        deal.get('stage', 'N/A')
+    ]
+
+def empty_table():
+    return {"rows": [], "newest_id": None, "oldest_id": None}
+
+def load_first_page():
+    """Load the newest page of leads without touching the extractor"""
+    table = empty_table()
+    leads = get_leads_page()
+    if leads:
+        table["rows"] = [format_lead(lead) for lead in leads]
+        table["newest_id"] = leads[0]["_id"]
+        table["oldest_id"] = leads[-1]["_id"]
+    return table["rows"], {}, table
+
+def load_more(table):
+    """Append the next page of older leads"""
+    leads = get_leads_page(before_id=table["oldest_id"]) if table["oldest_id"] is not None else []
+    if leads:
+        table["rows"] = table["rows"] + [format_lead(lead) for lead in leads]
+        table["oldest_id"] = leads[-1]["_id"]
+    return table["rows"], table
+
+def handle_processing(summary, table):
     """Handle the processing of meeting summary"""
     if not summary or not summary.strip():
-        return [], {"error": "Please provide a meeting summary"}
+        return table["rows"], {"error": "Please provide a meeting summary"}, table
     
     try:
-        # Process the meeting summary and retrieve updated leads
-        processed, leads = run_agent(summary.strip())
+        processed = process_meeting_summary(summary.strip())
+        # insert_one adds the ObjectId to the saved dict; keep it out of the JSON view
+        processed.pop("_id", None)
         
-        # Format leads for display in dataframe
-        if leads:
-            # Convert leads to a more readable format for the dataframe
-            formatted_leads = []
-            for lead in leads:
-                contact = lead.get('contact', {})
-                company = lead.get('company', {})
-                deal = lead.get('deal', {})
-                
-                formatted_lead = [
-                    contact.get('name', 'N/A'),
-                    contact.get('email', 'N/A'),
-                    contact.get('phone', 'N/A'),
-                    company.get('name', 'N/A'),
-                    company.get('industry', 'N/A'),
-                    deal.get('value', 'N/A'),
-                    deal.get('stage', 'N/A')
-                ]
-                formatted_leads.append(formatted_lead)
-            
-            return formatted_leads, processed
-        else:
-            return [], processed
+        # Only fetch leads saved since the newest one already shown
+        new_leads = get_leads_since(table["newest_id"])
+        if new_leads:
+            table["rows"] = [format_lead(lead) for lead in new_leads] + table["rows"]
+            table["newest_id"] = new_leads[0]["_id"]
+            if table["oldest_id"] is None:
+                table["oldest_id"] = new_leads[-1]["_id"]
+        
+        return table["rows"], processed, table
             
     except Exception as e:
         error_result = {"error": f"Processing failed: {str(e)}"}
-        return [], error_result
+        return table["rows"], error_result, table
 
 # Build Gradio interface
 with gr.Blocks(title="CRM Lead Processor", theme=gr.themes.Soft()) as demo:
@@ -49,8 +82,11 @@ with gr.Blocks(title="CRM Lead Processor", theme=gr.themes.Soft()) as demo:
             lead_view = gr.Dataframe(
                 headers=["Name", "Email", "Phone", "Company", "Industry", "Deal Value", "Stage"],
                 label="Lead Database",
-                interactive=False
+                interactive=False,
+                max_height=500  # Scroll within the table instead of rendering every row
             )
+            load_more_btn = gr.Button("Load More Leads", variant="secondary")
+            table_state = gr.State(empty_table())
         
         with gr.Column(scale=2):
             gr.Markdown("### Process New Meeting")
@@ -70,19 +106,26 @@ with gr.Blocks(title="CRM Lead Processor", theme=gr.themes.Soft()) as demo:
     # Event handlers
     process_btn.click(
         fn=handle_processing,
-        inputs=[summary_input],
-        outputs=[lead_view, result_out]
+        inputs=[summary_input, table_state],
+        outputs=[lead_view, result_out, table_state]
+    )
+    
+    load_more_btn.click(
+        fn=load_more,
+        inputs=[table_state],
+        outputs=[lead_view, table_state]
     )
     
     clear_btn.click(
-        fn=lambda: ("", [], {}),
+        fn=lambda table: ("", table["rows"], {}),
+        inputs=[table_state],
         outputs=[summary_input, lead_view, result_out]
     )
     
-    # Load existing leads on startup
+    # Load the first page of existing leads on startup
     demo.load(
-        fn=lambda: (run_agent("")[1], {}),  # Get existing leads without processing
-        outputs=[lead_view, result_out]
+        fn=load_first_page,
+        outputs=[lead_view, result_out, table_state]
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for agent_flow
+
+Usage: python check_import_time.py [--budget 1.0]
+
+Imports agent_flow in a fresh interpreter and fails if it takes longer than
+the budget or pulls in LangChain, Presidio or spaCy, which must only load
+on first use.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ["langchain", "langchain_community", "presidio_analyzer", "spacy"]
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import agent_flow
+elapsed = time.perf_counter() - started
+loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+def measure() -> dict:
+    here = os.path.dirname(os.path.abspath(__file__))
+    # Empty MONGO_URI so db.py doesn't open a connection during the import
+    env = dict(os.environ, MONGO_URI="")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=here, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum import time in seconds")
+    args = parser.parse_args()
+
+    stats = measure()
+    print(f"⏱️ import agent_flow: {stats['seconds'] * 1000:.0f}ms (budget {args.budget * 1000:.0f}ms)")
+    assert stats["seconds"] < args.budget, "agent_flow import is over budget"
+    assert not stats["loaded"], f"heavy modules loaded at import: {', '.join(stats['loaded'])}"
+    print("✅ Import-time budget OK")
@@ -6,6 +6,9 @@ from dotenv import load_dotenv
 load_dotenv()
 mongo_uri = os.getenv("MONGO_URI")
 
+# Leads per page in the Gradio table
+PAGE_SIZE = int(os.getenv("LEADS_PAGE_SIZE", "100"))
+
 if not mongo_uri:
     print("Warning: MONGO_URI not found in environment variables")
     client = None
@@ -49,4 +52,34 @@ def get_leads() -> list:
         return leads
     except Exception as e:
         print(f"Error retrieving leads: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def get_leads_page(before_id=None, limit: int = PAGE_SIZE) -> list:
+    """Retrieve one page of leads, newest first, older than before_id"""
+    if leads_col is None:
+        print("Warning: MongoDB not connected, returning empty list")
+        return []
+    
+    try:
+        query = {"_id": {"$lt": before_id}} if before_id is not None else {}
+        leads = list(leads_col.find(query).sort("_id", -1).limit(limit))
+        print(f"Retrieved page of {len(leads)} leads from database")
+        return leads
+    except Exception as e:
+        print(f"Error retrieving leads page: {e}")
+        return []
+
+def get_leads_since(after_id=None) -> list:
+    """Retrieve leads saved after after_id, newest first"""
+    if leads_col is None:
+        return []
+    if after_id is None:
+        return get_leads_page()
+    
+    try:
+        leads = list(leads_col.find({"_id": {"$gt": after_id}}).sort("_id", 1))
+        leads.reverse()
+        return leads
+    except Exception as e:
+        print(f"Error retrieving new leads: {e}")
+        return []
@@ -1,16 +1,6 @@
-import os
 import json
-from dotenv import load_dotenv
-from langchain_community.chat_models.openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-
-# Load environment variables
-load_dotenv()
-
-# Initialize ChatOpenAI
-model_name = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-llm = ChatOpenAI(model=model_name, temperature=0)
+from functools import lru_cache
+from llm_client import get_llm
 
 # Improved prompt template for more reliable JSON extraction
 template = '''
@@ -49,13 +39,19 @@ Meeting Summary:
 {text}
 '''
 
-prompt = PromptTemplate(template=template, input_variables=["text"])
-chain = LLMChain(llm=llm, prompt=prompt)
+@lru_cache(maxsize=None)
+def get_chain():
+    """Build the extraction chain on first use, sharing the LLM client"""
+    from langchain.prompts import PromptTemplate
+    from langchain.chains import LLMChain
+    prompt = PromptTemplate(template=template, input_variables=["text"])
+    return LLMChain(llm=get_llm(), prompt=prompt)
 
 def extract_entities(text: str) -> dict:
     """Extract CRM entities and return JSON dict, or error dict on failure."""
+    response = ""
     try:
-        response = chain.run(text=text)
+        response = get_chain().run(text=text)
         
         # Clean the response - remove any markdown formatting or extra text
         response = response.strip()
@@ -0,0 +1,14 @@
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+model_name = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+@lru_cache(maxsize=None)
+def get_llm():
+    """Build the shared ChatOpenAI client on first use"""
+    from langchain_community.chat_models.openai import ChatOpenAI
+    print(f"Initializing ChatOpenAI with model: {model_name}")
+    return ChatOpenAI(model=model_name, temperature=0)
@@ -1,13 +1,16 @@
-from presidio_analyzer import AnalyzerEngine
+from functools import lru_cache
 from typing import List
 
-# Initialize once
-analyzer = AnalyzerEngine()
+@lru_cache(maxsize=None)
+def get_analyzer():
+    """Load Presidio (and its spaCy model) once, on first use"""
+    from presidio_analyzer import AnalyzerEngine
+    return AnalyzerEngine()
 
 
 def detect_pii(text: str) -> List[dict]:
     """Detects PII spans and returns list of dicts with entity & positions."""
-    results = analyzer.analyze(text=text, language='en')
+    results = get_analyzer().analyze(text=text, language='en')
     return [
         {"entity": r.entity_type, "start": r.start, "end": r.end, "score": r.score}
         for r in results